@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ApiConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "blog.api"
+
+    def ready(self):
+        from blog.api import signals
+
+        signals.connect()
@@ -0,0 +1,79 @@
+import hashlib
+import json
+
+from django.core.cache import caches
+from graphql import FieldNode, FragmentSpreadNode, OperationType, print_ast
+from graphql_jwt.utils import get_http_authorization
+
+from blog.api.models import CacheVersion
+
+CONTENT_TAGS = {"post", "category", "image"}
+
+# Root query fields whose anonymous responses are cached, and the tags of the
+# data they can reach
+QUERY_TAGS = {
+    "posts": CONTENT_TAGS,
+    "post": CONTENT_TAGS,
+    "category": CONTENT_TAGS,
+    "categories": CONTENT_TAGS,
+    "categoryHierarchy": {"post", "category"},
+    "hashtag": CONTENT_TAGS,
+    "hashtags": CONTENT_TAGS,
+    "images": CONTENT_TAGS,
+    "image": CONTENT_TAGS,
+    "blogInfo": {"info"},
+    "__typename": set(),
+}
+
+response_cache = caches["graphql"]
+
+
+def root_fields(document, operation):
+    fields = []
+    for selection in operation.selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields.append(selection.name.value)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = next(
+                definition
+                for definition in document.definitions
+                if getattr(definition, "name", None)
+                and definition.name.value == selection.name.value
+            )
+            fields.extend(root_fields(document, fragment))
+        else:
+            fields.extend(root_fields(document, selection))
+    return fields
+
+
+def is_anonymous(request):
+    return not request.user.is_authenticated and not get_http_authorization(request)
+
+
+def query_tags(document, operation):
+    # None if the response must not be cached
+    if operation.operation != OperationType.QUERY:
+        return None
+
+    tags = set()
+    for field in root_fields(document, operation):
+        if field not in QUERY_TAGS:
+            return None
+        tags |= QUERY_TAGS[field]
+    return tags
+
+
+def cache_key(document, variables, operation_name, tags):
+    # Keyed on the normalized document, so that formatting and comments do not
+    # matter, and on the current versions of the tags
+    key = json.dumps(
+        [
+            print_ast(document),
+            variables or {},
+            operation_name,
+            CacheVersion.current(tags),
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return f"graphql:{hashlib.sha256(key.encode()).hexdigest()}"
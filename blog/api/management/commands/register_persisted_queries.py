@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.api.models import PersistedQuery
+from blog.api.persisted import parse_and_validate
+from blog.schema import schema
+
+
+def read_manifest(path):
+    # Either an Apollo persisted query manifest, or an object mapping hashes to
+    # queries
+    with open(path) as manifest:
+        data = json.load(manifest)
+
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    if "operations" in data:
+        return {operation["id"]: operation["body"] for operation in data["operations"]}
+    return data
+
+
+class Command(BaseCommand):
+    help = "Register the queries of a persisted query manifest"
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifest")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete the registered queries missing from the manifest",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, manifest, replace, **options):
+        try:
+            queries = read_manifest(manifest)
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            raise CommandError(f"Invalid manifest: {error}")
+
+        for query_hash, query in queries.items():
+            if PersistedQuery.hash_of(query) != query_hash:
+                raise CommandError(f"Hash {query_hash} does not match its query")
+            _, errors = parse_and_validate(schema.graphql_schema, query)
+            if errors:
+                raise CommandError(f"Query {query_hash} is invalid: {errors[0]}")
+
+        if replace:
+            PersistedQuery.objects.exclude(hash__in=queries).delete()
+        PersistedQuery.register(queries)
+        self.stdout.write(
+            self.style.SUCCESS(f"Registered {len(queries)} persisted queries")
+        )
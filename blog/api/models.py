@@ -0,0 +1,77 @@
+import hashlib
+
+from django.db import models, transaction
+from django.db.models import F
+
+
+class PendingBump:
+    # Tags changed in the current transaction. Every change registers flush()
+    # with on_commit, and the first one to run bumps all of them once. Tags
+    # left by a rolled back transaction are bumped with the next one, which
+    # is harmless.
+    def __init__(self):
+        self.tags = set()
+        self.flushed = False
+
+    def flush(self):
+        if not self.flushed:
+            self.flushed = True
+            CacheVersion.bump(self.tags)
+
+
+class CacheVersion(models.Model):
+    # Cached responses are keyed on the versions of the tags they depend on.
+    # Versions live in the database, so that a bump is seen by every worker.
+    tag = models.CharField(max_length=20, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.tag}: {self.version}"
+
+    @classmethod
+    def current(cls, tags):
+        versions = dict(cls.objects.filter(tag__in=tags).values_list("tag", "version"))
+        return {tag: versions.get(tag, 0) for tag in sorted(tags)}
+
+    @classmethod
+    def bump(cls, tags):
+        if not tags:
+            return
+        cls.objects.bulk_create([cls(tag=tag) for tag in tags], ignore_conflicts=True)
+        cls.objects.filter(tag__in=tags).update(version=F("version") + 1)
+
+    @classmethod
+    def bump_on_commit(cls, tags, using=None):
+        # Once per transaction however many rows change, and not at all if it
+        # rolls back
+        if not tags:
+            return
+        connection = transaction.get_connection(using)
+        pending = getattr(connection, "pending_cache_bump", None)
+        if pending is None or pending.flushed:
+            pending = connection.pending_cache_bump = PendingBump()
+        pending.tags.update(tags)
+        transaction.on_commit(pending.flush, using=using)
+
+
+class PersistedQuery(models.Model):
+    # Query documents registered under the SHA-256 hash of their text, so that
+    # clients can send the hash instead of the query
+    hash = models.CharField(max_length=64, primary_key=True)
+    query = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash
+
+    @staticmethod
+    def hash_of(query):
+        return hashlib.sha256(query.encode()).hexdigest()
+
+    @classmethod
+    def register(cls, queries):
+        # `queries` maps hashes to query texts
+        cls.objects.bulk_create(
+            [cls(hash=hash, query=query) for hash, query in queries.items()],
+            ignore_conflicts=True,
+        )
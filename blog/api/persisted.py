@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLError, parse, validate
+
+from blog.api.models import PersistedQuery
+
+
+class PersistedQueryNotFoundError(GraphQLError):
+    # Message and code that APQ clients expect before resending the query
+    # together with its hash
+    def __init__(self):
+        super().__init__(
+            "PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"}
+        )
+
+
+def parse_and_validate(schema, query, rules=None):
+    try:
+        document = parse(query)
+    except GraphQLError as error:
+        return None, [error]
+
+    errors = validate(
+        schema, document, rules, max_errors=graphene_settings.MAX_VALIDATION_ERRORS
+    )
+    return document, errors
+
+
+class DocumentCache:
+    # Results of parse_and_validate() in this process, keyed by the schema, the
+    # validation rules and the SHA-256 hash of the query (the hash persisted
+    # queries are registered under). The least recently used result is evicted
+    # beyond `max_size`.
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.results.move_to_end(key)
+            return result
+
+    def set(self, key, result):
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            if len(self.results) > self.max_size:
+                self.results.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.results),
+            "max_size": self.max_size,
+        }
+
+
+document_cache = DocumentCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+def get_document(schema, query_hash, query=None, rules=None):
+    # Parsed and validated once per process. Without `query`, the registered
+    # query is loaded, and PersistedQuery.DoesNotExist raised for unknown hashes.
+    key = (schema, tuple(rules) if rules is not None else None, query_hash)
+    result = document_cache.get(key)
+    if result is None:
+        if query is None:
+            query = PersistedQuery.objects.values_list("query", flat=True).get(
+                hash=query_hash
+            )
+        result = parse_and_validate(schema, query, rules)
+        document_cache.set(key, result)
+    return result
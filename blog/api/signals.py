@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from blog.api.models import CacheVersion
+
+# Tags of the cached responses that change with the rows of each model.
+# Writes that bypass the signals (QuerySet.update, raw SQL) bump their tags
+# themselves.
+MODEL_TAGS = {
+    "core.Post": {"post"},
+    "core.Draft": {"post"},
+    "core.Template": {"post"},
+    "core.Hashtag": {"post"},
+    "core.Category": {"category"},
+    "media.Image": {"image"},
+    "media.ImageVariant": {"image"},
+    "info.Info": {"info"},
+}
+
+
+def model_tags(model):
+    return MODEL_TAGS.get(model._meta.label, set())
+
+
+def invalidate(sender, using, **kwargs):
+    CacheVersion.bump_on_commit(model_tags(sender), using=using)
+
+
+def invalidate_relation(sender, instance, action, model, using, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        CacheVersion.bump_on_commit(
+            model_tags(type(instance)) | model_tags(model), using=using
+        )
+
+
+def connect():
+    for label in MODEL_TAGS:
+        model = apps.get_model(label)
+        post_save.connect(invalidate, sender=model)
+        post_delete.connect(invalidate, sender=model)
+    m2m_changed.connect(invalidate_relation)
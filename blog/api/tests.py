@@ -0,0 +1,164 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from graphene.validation import DisableIntrospection
+
+from blog.api.cache import response_cache
+from blog.api.models import CacheVersion, PersistedQuery
+from blog.api.persisted import document_cache
+from blog.api.views import GraphQLView
+from blog.info.models import Info
+
+QUERY = "{ blogInfo { title } }"
+
+
+class GraphQLViewTest(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        document_cache.clear()
+        Info.objects.create(title="blog")
+
+    def post(self, body, **headers):
+        return self.client.post(
+            "/api/", json.dumps(body), content_type="application/json", **headers
+        )
+
+    def persisted(self, query_hash, query=None):
+        body = {
+            "extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+        }
+        if query is not None:
+            body["query"] = query
+        return self.post(body)
+
+    def test_not_modified(self):
+        response = self.client.get("/api/", {"query": QUERY})
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        response = self.client.get("/api/", {"query": QUERY}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+        # A write changes the key, so the response is sent again
+        with self.captureOnCommitCallbacks(execute=True):
+            Info.objects.update_or_create(defaults={"title": "renamed"})
+        response = self.client.get("/api/", {"query": QUERY}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["data"]["blogInfo"]["title"], "renamed")
+
+    def test_cached_until_written(self):
+        self.post({"query": QUERY})
+        Info.objects.update(title="renamed")
+        self.assertEqual(
+            self.post({"query": QUERY}).json()["data"]["blogInfo"]["title"], "blog"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Info.objects.get().save()
+        self.assertEqual(CacheVersion.current({"info"}), {"info": 1})
+        self.assertEqual(
+            self.post({"query": QUERY}).json()["data"]["blogInfo"]["title"], "renamed"
+        )
+
+    def test_not_cached_for_users(self):
+        self.client.force_login(User.objects.create(username="admin"))
+        response = self.client.get("/api/", {"query": QUERY})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_executes_cached_documents(self):
+        self.post({"query": QUERY})
+        response_cache.clear()
+
+        # Neither parsed nor validated again, by the cache or by graphene-django
+        with mock.patch("blog.api.persisted.parse") as parse, mock.patch(
+            "graphene_django.views.parse"
+        ) as view_parse, mock.patch("graphene_django.views.validate") as validate:
+            response = self.post({"query": QUERY})
+        self.assertEqual(response.json()["data"]["blogInfo"]["title"], "blog")
+        for function in (parse, view_parse, validate):
+            function.assert_not_called()
+        self.assertEqual(document_cache.info()["hits"], 1)
+
+    def test_validation_rules_of_view(self):
+        query = "{ __schema { queryType { name } } }"
+        self.post({"query": query})
+
+        view = GraphQLView.as_view(validation_rules=[DisableIntrospection])
+        request = RequestFactory().post(
+            "/api/", json.dumps({"query": query}), content_type="application/json"
+        )
+        request.user = AnonymousUser()
+        response = view(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(
+            "introspection", json.loads(response.content)["errors"][0]["message"]
+        )
+
+    def test_rejects_mutations_over_get(self):
+        response = self.client.get(
+            "/api/", {"query": "mutation { deleteCategory(id: 1) { success } }"}
+        )
+        self.assertEqual(response.status_code, 405)
+
+    def test_persisted_query(self):
+        query_hash = PersistedQuery.hash_of(QUERY)
+        response = self.persisted(query_hash)
+        self.assertEqual(
+            response.json()["errors"][0]["message"], "PersistedQueryNotFound"
+        )
+
+        response = self.persisted(query_hash, QUERY)
+        self.assertEqual(response.json()["data"]["blogInfo"]["title"], "blog")
+        # Kept by this process only, since the client is not staff
+        self.assertFalse(PersistedQuery.objects.exists())
+        self.assertEqual(
+            self.persisted(query_hash).json()["data"]["blogInfo"]["title"], "blog"
+        )
+
+    def test_executes_stored_document(self):
+        query_hash = PersistedQuery.hash_of(QUERY)
+        PersistedQuery.register({query_hash: QUERY})
+        self.persisted(query_hash)
+        response_cache.clear()
+
+        # Sent by its hash alone, the query is neither loaded nor parsed again
+        with mock.patch("blog.api.persisted.parse") as parse, CaptureQueriesContext(
+            connection
+        ) as queries:
+            response = self.persisted(query_hash)
+        self.assertEqual(response.json()["data"]["blogInfo"]["title"], "blog")
+        parse.assert_not_called()
+        self.assertFalse(
+            any(PersistedQuery._meta.db_table in query["sql"] for query in queries)
+        )
+
+    def test_rejects_mismatched_hash(self):
+        response = self.persisted("0" * 64, QUERY)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["errors"][0]["extensions"]["type"], "InvalidValueError"
+        )
+        self.assertFalse(PersistedQuery.objects.exists())
+
+    def test_staff_registers_queries(self):
+        self.client.force_login(User.objects.create(username="admin", is_staff=True))
+        self.persisted(PersistedQuery.hash_of(QUERY), QUERY)
+        self.assertTrue(PersistedQuery.objects.filter(query=QUERY).exists())
+
+    @override_settings(GRAPHQL_PERSISTED_QUERIES="allowlist")
+    def test_allowlist(self):
+        response = self.post({"query": QUERY})
+        self.assertEqual(
+            response.json()["errors"][0]["extensions"]["type"], "PermissionDeniedError"
+        )
+
+        PersistedQuery.register({PersistedQuery.hash_of(QUERY): QUERY})
+        response = self.persisted(PersistedQuery.hash_of(QUERY))
+        self.assertEqual(response.json()["data"]["blogInfo"]["title"], "blog")
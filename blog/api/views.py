@@ -0,0 +1,218 @@
+import json
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import authenticate
+from django.db import connection, transaction
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    JsonResponse,
+)
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import HttpError
+from graphene_file_upload.django import FileUploadGraphQLView
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast
+from graphql_jwt.exceptions import JSONWebTokenError
+
+from blog.api.cache import cache_key, is_anonymous, query_tags, response_cache
+from blog.api.models import PersistedQuery
+from blog.api.persisted import PersistedQueryNotFoundError, document_cache, get_document
+from blog.core.errors import InvalidValueError, PermissionDeniedError
+
+
+class GraphQLView(FileUploadGraphQLView):
+    # Resolves persisted queries and serves anonymous queries from the response
+    # cache. Cached responses are invalidated by the writes (blog.api.signals).
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        query_hash = self.get_persisted_query_hash(request, data)
+        if not query and not query_hash:
+            return super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        # Parsed and validated with the rules of the view once per process
+        document, errors = self.get_document(request, query, query_hash)
+        if document is None:
+            return ExecutionResult(errors=errors)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation = get_operation_ast(document, operation_name)
+        tags = query_tags(document, operation) if operation is not None else None
+        if tags is None or not is_anonymous(request):
+            return self.execute_document(
+                request, document, operation, variables, operation_name, show_graphiql
+            )
+
+        key = cache_key(document, variables, operation_name, tags)
+        if request.method.lower() == "get":
+            # The key changes with the response, so it serves as a strong ETag
+            request.graphql_etag = quote_etag(key)
+            etags = parse_etags(request.headers.get("If-None-Match", ""))
+            if request.graphql_etag in etags or "*" in etags:
+                request.graphql_not_modified = True
+                return ExecutionResult(data=None)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            return ExecutionResult(data=cached)
+
+        result = self.execute_document(
+            request, document, operation, variables, operation_name, show_graphiql
+        )
+        if result is not None and not result.errors:
+            response_cache.set(key, result.data)
+        else:
+            request.graphql_etag = None
+        return result
+
+    def execute_document(
+        self, request, document, operation, variables, operation_name, show_graphiql
+    ):
+        # What graphene-django's execute_graphql_request does after validating,
+        # including ATOMIC_MUTATIONS
+        if (
+            request.method.lower() == "get"
+            and operation is not None
+            and operation.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    f"Can only perform a {operation.operation.value} operation "
+                    "from a POST request.",
+                )
+            )
+
+        try:
+            options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                options["execution_context_class"] = self.execution_context_class
+
+            schema = self.schema.graphql_schema
+            if (
+                operation is not None
+                and operation.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        etag = getattr(request, "graphql_etag", None)
+        if etag is None or response.status_code != 200:
+            return response
+
+        # Anonymous reads over GET may be stored by browsers and shared caches,
+        # which revalidate them with If-None-Match
+        if getattr(request, "graphql_not_modified", False):
+            response = HttpResponseNotModified()
+        response["ETag"] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def parse_body(self, request):
+        if self.get_content_type(request) == "multipart/form-data":
+            # Reading the files runs the upload handlers, which drop a file
+            # that is too large
+            request.FILES
+            if getattr(request, "upload_too_large", False):
+                raise HttpError(
+                    HttpResponse(status=413, content="Uploaded file is too large.")
+                )
+        return super().parse_body(request)
+
+    @staticmethod
+    def get_persisted_query_hash(request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+
+        persisted_query = (
+            extensions.get("persistedQuery") if isinstance(extensions, dict) else None
+        )
+        if not isinstance(persisted_query, dict):
+            return None
+        query_hash = persisted_query.get("sha256Hash")
+        if query_hash is None:
+            return None
+        if not isinstance(query_hash, str):
+            raise HttpError(HttpResponseBadRequest("Persisted query hash is invalid."))
+        return query_hash.lower()
+
+    def get_document(self, request, query, query_hash):
+        # Without an allowlist, an unknown hash is accepted once the query is
+        # sent along with it. Only staff registrations are stored; the others
+        # stay in the document cache of the process, which is bounded.
+        schema = self.schema.graphql_schema
+        allowlist = settings.GRAPHQL_PERSISTED_QUERIES == "allowlist"
+        rules = self.validation_rules
+        if query_hash is None and not allowlist:
+            return get_document(schema, PersistedQuery.hash_of(query), query, rules)
+        if query_hash is None:
+            query_hash = PersistedQuery.hash_of(query)
+
+        try:
+            return get_document(schema, query_hash, rules=rules)
+        except PersistedQuery.DoesNotExist:
+            pass
+
+        if allowlist:
+            return None, [PermissionDeniedError("등록되지 않은 쿼리입니다")]
+        if not query:
+            return None, [PersistedQueryNotFoundError()]
+        if PersistedQuery.hash_of(query) != query_hash:
+            return None, [InvalidValueError("쿼리의 해시가 일치하지 않습니다")]
+
+        document, errors = get_document(schema, query_hash, query, rules)
+        if not errors and self.is_staff(request):
+            PersistedQuery.register({query_hash: query})
+        return document, errors
+
+    @staticmethod
+    def is_staff(request):
+        user = request.user
+        if not user.is_authenticated:
+            try:
+                user = authenticate(request=request)
+            except JSONWebTokenError:
+                return False
+        return user is not None and user.is_staff
+
+
+@staff_member_required
+def document_cache_stats(request):
+    # Counters of the worker process that serves the request
+    return JsonResponse(document_cache.info())
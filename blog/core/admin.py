@@ -4,7 +4,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from mptt.admin import DraggableMPTTAdmin
 
-from blog.core.models import Category, Draft, Hashtag, Post, Template
+from blog.core.models import Category, CategoryPostCount, Draft, Hashtag, Post, Template
 
 
 def content_preview(content: str):
@@ -40,6 +40,29 @@ admin.site.register(Hashtag, HashtagAdmin)
 
 
 class CategoryAdmin(DraggableMPTTAdmin):
+    # Keeps CategoryPostCount in sync with changes made through the admin
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "is_hidden" in form.changed_data:
+            CategoryPostCount.recount(
+                obj.get_descendants(include_self=True).values_list("id", flat=True)
+            )
+
+    def delete_model(self, request, obj):
+        # The posts of the deleted subtree become uncategorized
+        category_ids = list(
+            obj.get_descendants(include_self=True).values_list("id", flat=True)
+        )
+        super().delete_model(request, obj)
+        CategoryPostCount.recount([0, *category_ids])
+
+    def delete_queryset(self, request, queryset):
+        category_ids = list(
+            queryset.get_descendants(include_self=True).values_list("id", flat=True)
+        )
+        super().delete_queryset(request, queryset)
+        CategoryPostCount.recount([0, *category_ids])
 
     def cover(self, instance: Category):
         if instance.cover_image:
@@ -64,6 +87,25 @@ admin.site.register(Category, CategoryAdmin)
 
 
 class PostAdmin(admin.ModelAdmin):
+    # Keeps CategoryPostCount in sync with changes made through the admin
+
+    def save_model(self, request, obj, form, change):
+        before = CategoryPostCount.state_of(
+            Post.objects.filter(pk=obj.pk).first() if change else None
+        )
+        super().save_model(request, obj, form, change)
+        CategoryPostCount.update(before, CategoryPostCount.state_of(obj))
+
+    def delete_model(self, request, obj):
+        before = CategoryPostCount.state_of(obj)
+        super().delete_model(request, obj)
+        CategoryPostCount.update(before, None)
+
+    def delete_queryset(self, request, queryset):
+        category_ids = set(queryset.values_list("category_id", flat=True))
+        super().delete_queryset(request, queryset)
+        CategoryPostCount.recount(category_ids)
+
     def assigned_tags(self, instance: Post):
         return format_tags(instance.tags.values_list("name", flat=True))
 
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.core.models import Hashtag
+
+
+class Command(BaseCommand):
+    help = "Delete the hashtags that no post, draft or template is tagged with"
+
+    def handle(self, *args, **options):
+        deleted = Hashtag.delete_orphans()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} orphan hashtags"))
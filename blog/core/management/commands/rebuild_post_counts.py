@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.core.models import CategoryPostCount
+
+
+class Command(BaseCommand):
+    help = "Recount the posts of every category into CategoryPostCount"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            CategoryPostCount.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt post counts of {CategoryPostCount.objects.exclude(category_id=0).count()} categories"
+            )
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.7 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0029_alter_hashtag_options_alter_draft_tags_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="core_post_created_1e8110_idx"
+            ),
+        ),
+    ]
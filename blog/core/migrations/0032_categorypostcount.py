@@ -0,0 +1,46 @@
+# Generated by Django 5.0.7 on 2026-10-18 16:55
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_posts(apps, schema_editor):
+    # Existing posts are counted once, later changes update the counts
+    CategoryPostCount = apps.get_model("core", "CategoryPostCount")
+    Post = apps.get_model("core", "Post")
+    CategoryPostCount.objects.bulk_create(
+        CategoryPostCount(
+            category_id=category_id or 0, self_total=total, self_visible=visible
+        )
+        for category_id, total, visible in Post.objects.filter(is_deleted=False)
+        .order_by()
+        .values_list("category_id")
+        .annotate(
+            total=Count("id"),
+            visible=Count(
+                "id", filter=~Q(is_hidden=True) & ~Q(category__is_hidden=True)
+            ),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0031_post_search_vector_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryPostCount",
+            fields=[
+                (
+                    "category_id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("self_total", models.PositiveIntegerField(default=0)),
+                ("self_visible", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -1,2 +1,3 @@
 from .category import Category
+from .counter import CategoryPostCount
 from .post import Draft, Hashtag, Post, Template
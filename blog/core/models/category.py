@@ -1,7 +1,7 @@
 from django.db import models
 from mptt.models import MPTTModel, TreeForeignKey
 
-from blog.storage import OBS
+from blog.storage import OBS, delete_files_on_commit
 
 
 class Category(MPTTModel):
@@ -29,7 +29,7 @@ class Category(MPTTModel):
         parent_attr = "subcategory_of"
 
     def delete(self, *args, **kwargs):
-        self.cover_image.delete()
+        delete_files_on_commit([self.cover_image.name])
         super().delete(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,161 @@
+from collections import defaultdict
+
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Q, Sum
+
+from blog.api.models import CacheVersion
+
+from .category import Category
+from .post import Post
+
+
+class CategoryPostCount(models.Model):
+    # Posts directly in each category, 0 holding the uncategorized posts.
+    # Subtree counts are summed from these rows when read, so moving or
+    # deleting a category does not touch the counts of its ancestors.
+    category_id = models.BigIntegerField(primary_key=True)
+    self_total = models.PositiveIntegerField(default=0)
+    self_visible = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category_id}: {self.self_total} ({self.self_visible})"
+
+    @staticmethod
+    def field(authenticated):
+        return "self_total" if authenticated else "self_visible"
+
+    @classmethod
+    def count(cls, category, authenticated, exclude_subcategories=False):
+        # `category` with id None stands for every post, and with id 0 for the
+        # uncategorized posts
+        rows = cls.objects.all()
+        if category.id == 0 or (category.id is not None and exclude_subcategories):
+            rows = rows.filter(category_id=category.id)
+        elif category.id is not None:
+            rows = rows.filter(
+                category_id__in=category.get_descendants(include_self=True).values("id")
+            )
+        return rows.aggregate(count=Sum(cls.field(authenticated)))["count"] or 0
+
+    @classmethod
+    def subtree_counts(cls, categories, authenticated):
+        # Counts of the subtrees of `categories`, which are in (tree_id, lft)
+        # order, keyed like count(): None for every post and 0 for the
+        # uncategorized ones
+        counts = defaultdict(
+            int, cls.objects.values_list("category_id", cls.field(authenticated))
+        )
+        totals = {category.id: counts[category.id] for category in categories}
+        totals[0] = counts[0]
+        totals[None] = sum(counts.values())
+        # Descendants come after their ancestors, so summing in reverse adds up
+        # every subtree
+        for category in reversed(categories):
+            if category.subcategory_of_id is not None:
+                totals[category.subcategory_of_id] += totals[category.id]
+        return totals
+
+    @staticmethod
+    def state_of(post):
+        # Category and visibility the post is counted with, or None
+        if post is None or post.is_deleted:
+            return None
+        category_hidden = post.category is not None and post.category.is_hidden
+        return post.category_id or 0, not post.is_hidden and not category_hidden
+
+    @classmethod
+    @transaction.atomic
+    def update(cls, before, after):
+        # Moves a post counted as `before` to `after` (states from state_of)
+        changes = defaultdict(lambda: [0, 0])
+        if before is not None:
+            changes[before[0]][0] -= 1
+            changes[before[0]][1] -= before[1]
+        if after is not None:
+            changes[after[0]][0] += 1
+            changes[after[0]][1] += after[1]
+
+        changes = {
+            category_id: change
+            for category_id, change in changes.items()
+            if change != [0, 0]
+        }
+        if not changes:
+            return
+        # A new category starts without posts
+        cls.objects.bulk_create(
+            [cls(category_id=category_id) for category_id in changes],
+            ignore_conflicts=True,
+        )
+        # Rows are updated in one order, so that concurrent updates cannot
+        # deadlock
+        for category_id in sorted(changes):
+            total, visible = changes[category_id]
+            cls.objects.filter(category_id=category_id).update(
+                self_total=F("self_total") + total,
+                self_visible=F("self_visible") + visible,
+            )
+
+    @staticmethod
+    def count_posts(posts):
+        return {
+            category_id or 0: (total, visible)
+            for category_id, total, visible in posts.filter(is_deleted=False)
+            .order_by()
+            .values_list("category_id")
+            .annotate(
+                total=Count("id"),
+                visible=Count(
+                    "id", filter=~Q(is_hidden=True) & ~Q(category__is_hidden=True)
+                ),
+            )
+        }
+
+    @classmethod
+    @transaction.atomic
+    def recount(cls, category_ids):
+        # For changes to many posts at once, e.g. hiding or deleting categories.
+        # The rows are locked first, so a concurrent update of the same
+        # categories waits and then applies its change to the new counts.
+        category_ids = sorted({category_id or 0 for category_id in category_ids})
+        cls.objects.bulk_create(
+            [cls(category_id=category_id) for category_id in category_ids],
+            ignore_conflicts=True,
+        )
+        list(
+            cls.objects.select_for_update()
+            .filter(category_id__in=category_ids)
+            .order_by("category_id")
+        )
+
+        posts = Post.objects.filter(category__in=category_ids)
+        if 0 in category_ids:
+            posts = Post.objects.filter(
+                Q(category__in=category_ids) | Q(category__isnull=True)
+            )
+        post_counts = cls.count_posts(posts)
+        cls.objects.bulk_create(
+            [
+                cls(
+                    category_id=category_id,
+                    self_total=post_counts.get(category_id, (0, 0))[0],
+                    self_visible=post_counts.get(category_id, (0, 0))[1],
+                )
+                for category_id in category_ids
+            ],
+            update_conflicts=True,
+            unique_fields=["category_id"],
+            update_fields=["self_total", "self_visible"],
+        )
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls):
+        # Recounts every category, for rebuild_post_counts. Writers wait for the
+        # table lock, and readers keep reading the previous counts.
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {cls._meta.db_table} IN EXCLUSIVE MODE")
+        category_ids = [0, *Category.objects.values_list("id", flat=True)]
+        cls.objects.exclude(category_id__in=category_ids).delete()
+        cls.recount(category_ids)
+        CacheVersion.bump_on_commit({"post", "category"})
@@ -1,6 +1,9 @@
-from django.db import models
-from django.db.models.functions import Lower
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models.functions import Lower, Upper
 
+from blog.api.models import CacheVersion
 from blog.media.models import Image
 
 from . import Category
@@ -15,13 +18,42 @@ class Hashtag(models.Model):
     def __str__(self):
         return self.name
 
-    def is_orphan(self):
-        return (
-            self.tagged_template.count()
-            + self.tagged_draft.count()
-            + self.tagged_post.count()
-            == 0
-        )
+    @classmethod
+    def delete_orphans(cls, ids=None):
+        # Deletes the tags (among `ids`, if given) that nothing is tagged with,
+        # in one DELETE ... WHERE NOT EXISTS over the through tables
+        quote = connection.ops.quote_name
+        table = quote(cls._meta.db_table)
+        conditions = []
+        params = []
+        if ids is not None:
+            if not ids:
+                return 0
+            conditions.append(f"{table}.id = ANY(%s)")
+            params.append(list(ids))
+
+        for relation in cls._meta.related_objects:
+            if relation.many_to_many:
+                field = relation.field
+                conditions.append(
+                    f"NOT EXISTS (SELECT 1 FROM {quote(field.m2m_db_table())} "
+                    f"WHERE {quote(field.m2m_reverse_name())} = {table}.id)"
+                )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE {' AND '.join(conditions)}", params
+            )
+            deleted = cursor.rowcount
+        if deleted:
+            CacheVersion.bump_on_commit({"post"})
+        return deleted
+
+    @classmethod
+    def delete_orphans_on_commit(cls, ids=None):
+        # Runs after the transaction commits, outside of it
+        ids = None if ids is None else set(ids)
+        transaction.on_commit(lambda: cls.delete_orphans(ids))
 
 
 class AbstractTemplate(models.Model):
@@ -44,6 +76,31 @@ class AbstractTemplate(models.Model):
     class Meta:
         abstract = True
 
+    def set_tags(self, names):
+        # Creates the missing tags in bulk and applies the difference to the
+        # current tags. Returns the ids of the tags taken off.
+        names = set(names)
+        tag_ids = dict(Hashtag.objects.filter(name__in=names).values_list("name", "id"))
+        missing = names - tag_ids.keys()
+        if missing:
+            # Only the missing tags are inserted, so that existing ones do not
+            # use up ids. Conflicts are tags created concurrently.
+            Hashtag.objects.bulk_create(
+                [Hashtag(name=name) for name in missing], ignore_conflicts=True
+            )
+            tag_ids.update(
+                Hashtag.objects.filter(name__in=missing).values_list("name", "id")
+            )
+        tag_ids = set(tag_ids.values())
+        previous_tag_ids = set(self.tags.values_list("id", flat=True))
+
+        removed_tag_ids = previous_tag_ids - tag_ids
+        if removed_tag_ids:
+            self.tags.remove(*removed_tag_ids)
+        if tag_ids - previous_tag_ids:
+            self.tags.add(*(tag_ids - previous_tag_ids))
+        return removed_tag_ids
+
 
 class Template(AbstractTemplate):
     template_name = models.CharField(max_length=100, null=False, blank=False)
@@ -79,13 +136,40 @@ class Draft(AbstractDraft):
         return f'[{self.category.name if self.category is not None else "분류 미지정"}] {self.title} (임시 저장본)'
 
 
+class PostManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
 class Post(AbstractDraft):
     text_content = models.TextField(null=True, blank=True)
     is_deleted = models.BooleanField(default=False)
     deleted_at = models.DateTimeField(null=True, blank=True)
+    # Title is weighted "A" and content "B" so that either can be searched alone
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", weight="A", config="simple")
+        + SearchVector("text_content", weight="B", config="simple"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = PostManager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+            GinIndex(fields=["search_vector"], name="core_post_search_idx"),
+            # Trigram indexes back the `icontains` lookups (UPPER(...) LIKE ...)
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="core_post_title_trgm_idx",
+            ),
+            GinIndex(
+                OpClass(Upper("text_content"), name="gin_trgm_ops"),
+                name="core_post_content_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return f'[{self.category.name if self.category is not None else "분류 미지정"}] {self.title}'
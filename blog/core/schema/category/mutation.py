@@ -1,13 +1,16 @@
 from os.path import splitext
 
 import graphene
-from django.core.files.base import ContentFile
 from django.db import DatabaseError, IntegrityError
 from django.db.transaction import atomic
 from graphene_file_upload.scalars import Upload
 
-from blog.core.errors import InternalServerError, NotFoundError
-from blog.core.models import Category
+from blog.api.models import CacheVersion
+from blog.core.errors import InternalServerError, InvalidValueError, NotFoundError
+from blog.core.models import Category, CategoryPostCount, Post
+from blog.media.utils import is_image_file
+from blog.prerender.snapshots import prerender_on_commit
+from blog.storage import clear_file, unique_name
 from blog.utils.decorators import login_required
 
 from . import CategoryType
@@ -41,6 +44,9 @@ class CreateCategoryMutation(graphene.Mutation):
         else:
             supercategory = None
 
+        if data.cover_image is not None and not is_image_file(data.cover_image):
+            raise InvalidValueError("이미지 파일이 아닙니다")
+
         try:
             category = Category.objects.create(
                 name=data.name,
@@ -52,6 +58,7 @@ class CreateCategoryMutation(graphene.Mutation):
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
+        prerender_on_commit(category_ids=[category.id])
         return CreateCategoryMutation(success=True, created_category=category)
 
 
@@ -85,25 +92,40 @@ class UpdateCategoryMutation(graphene.Mutation):
             category.subcategory_of = None
         category.description = data.get("description")
         is_hidden = data.get("is_hidden")
+        was_hidden = category.is_hidden
         if is_hidden and not category.is_hidden:
             category.get_descendants().update(is_hidden=True)
         category.is_hidden = is_hidden
 
         if "cover_image" in data:
             cover_image = data.get("cover_image")
-            category.cover_image.delete(save=False)
+            if cover_image is not None and not is_image_file(cover_image):
+                raise InvalidValueError("이미지 파일이 아닙니다")
+            clear_file(category.cover_image)
             if cover_image is not None:
-                content_file = ContentFile(cover_image.read())
                 _, ext = splitext(cover_image.name)
                 category.cover_image.save(
-                    f"{category.id}{ext}", content_file, save=False
+                    unique_name(f"{category.id}{ext}"), cover_image, save=False
                 )
 
         try:
             category.save()
+            if is_hidden != was_hidden:
+                # Shows or hides the posts of the subtree
+                CategoryPostCount.recount(
+                    category.get_descendants(include_self=True).values_list(
+                        "id", flat=True
+                    )
+                )
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
+        # Hiding a category hides its subtree and the posts in it
+        prerender_on_commit(
+            category_ids=list(
+                category.get_descendants(include_self=True).values_list("id", flat=True)
+            )
+        )
         return UpdateCategoryMutation(success=True, updated_category=category)
 
 
@@ -113,6 +135,8 @@ class DeleteCategoryMutation(graphene.Mutation):
         delete_posts = graphene.Boolean()
 
     success = graphene.Boolean()
+    category_count = graphene.Int()
+    post_count = graphene.Int()
 
     @staticmethod
     @atomic
@@ -123,23 +147,31 @@ class DeleteCategoryMutation(graphene.Mutation):
 
         try:
             category = Category.objects.get(id=category_id)
-            for subcategory in category.get_descendants(include_self=True):
-                subcategory.is_deleted = True
-                subcategory.save(update_fields=["is_deleted"])
-                for post in subcategory.posts.all():
-                    if delete_posts:
-                        post.is_deleted = True
-                        post.save(update_fields=["is_deleted"])
-                    else:
-                        post.category = None
-                        post.save(update_fields=["category"])
-
-            return DeleteCategoryMutation(success=True)
         except Category.DoesNotExist:
             raise NotFoundError("게시판을 찾을 수 없습니다")
+
+        # The subtree is a (tree_id, lft, rght) range, so the cascade is one
+        # UPDATE for the categories and one for their posts. Rows deleted
+        # before are left as they are and not counted.
+        subtree = category.get_descendants(include_self=True)
+        posts = Post.objects.filter(category__in=subtree, is_deleted=False)
+
+        try:
+            if delete_posts:
+                post_count = posts.update(is_deleted=True)
+            else:
+                post_count = posts.update(category=None)
+            category_count = subtree.filter(is_deleted=False).update(is_deleted=True)
+            CacheVersion.bump_on_commit({"post", "category"})
+            CategoryPostCount.recount([0, *subtree.values_list("id", flat=True)])
         except DatabaseError:
             raise InternalServerError()
 
+        prerender_on_commit()
+        return DeleteCategoryMutation(
+            success=True, category_count=category_count, post_count=post_count
+        )
+
 
 class Mutation(graphene.ObjectType):
     create_category = CreateCategoryMutation.Field()
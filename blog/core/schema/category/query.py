@@ -4,7 +4,7 @@ import graphene
 from django.db.models import Q
 
 from blog.core.errors import NotFoundError, PermissionDeniedError
-from blog.core.models import Category, Post
+from blog.core.models import Category, CategoryPostCount
 from blog.utils.decorators import login_required
 
 from . import CategoryType
@@ -55,52 +55,47 @@ class Query(graphene.ObjectType):
     @staticmethod
     def resolve_category_hierarchy(self, info):
         authenticated = info.context.user.is_authenticated
-        root_categories = Category.objects.root_nodes().filter(is_deleted=False)
-        all_posts = Post.objects.exclude(is_deleted=True)
+        categories = list(Category.objects.order_by("tree_id", "lft"))
+        post_counts = CategoryPostCount.subtree_counts(categories, authenticated)
 
-        if not authenticated:
-            root_categories = root_categories.exclude(is_hidden=True)
-            all_posts = all_posts.exclude(
-                Q(category__is_hidden=True) | Q(is_hidden=True)
-            )
-
-        def category_to_dict(instance):
-            subcategories = instance.subcategories.filter(is_deleted=False)
-
-            if not authenticated:
-                subcategories = subcategories.exclude(is_hidden=True)
+        root_categories = []
+        visible_categories = {}
+        for category in categories:
+            if category.is_deleted or (category.is_hidden and not authenticated):
+                continue
 
             result = {
-                "id": instance.id,
-                "isHidden": instance.is_hidden,
-                "name": instance.name,
-                "level": instance.level,
-                "postCount": all_posts.filter(
-                    category__in=instance.get_descendants(include_self=True)
-                ).count(),
-                "subcategories": [
-                    category_to_dict(subcategory) for subcategory in subcategories
-                ],
+                "id": category.id,
+                "isHidden": category.is_hidden,
+                "name": category.name,
+                "level": category.level,
+                "postCount": post_counts[category.id],
+                "subcategories": [],
             }
-            return result
+            visible_categories[category.id] = result
+
+            if category.subcategory_of_id is None:
+                root_categories.append(result)
+            elif category.subcategory_of_id in visible_categories:
+                visible_categories[category.subcategory_of_id]["subcategories"].append(
+                    result
+                )
 
         categories_list = [
             {
                 "name": "전체 게시글",
                 "level": 0,
-                "postCount": all_posts.count(),
+                "postCount": post_counts[None],
                 "subcategories": [],
             }
         ]
-        categories_list.extend(
-            [category_to_dict(category) for category in root_categories]
-        )
+        categories_list.extend(root_categories)
         categories_list.append(
             {
                 "id": 0,
                 "name": "분류 미지정",
                 "level": 0,
-                "postCount": all_posts.filter(category__isnull=True).count(),
+                "postCount": post_counts[0],
                 "subcategories": [],
             }
         )
@@ -1,9 +1,8 @@
 import graphene
-from django.db.models import Q
 from graphene_django import DjangoObjectType
 
 from blog.core.errors import PermissionDeniedError
-from blog.core.models import Category, Post
+from blog.core.models import Category, CategoryPostCount, Post
 
 
 class CategoryType(DjangoObjectType):
@@ -62,24 +61,9 @@ class CategoryType(DjangoObjectType):
 
     @staticmethod
     def resolve_post_count(self, info, exclude_subcategories=False):
-        posts = Post.objects.exclude(is_deleted=True)
-
-        if not info.context.user.is_authenticated:
-            posts = posts.exclude(Q(is_hidden=True) | Q(category__is_hidden=True))
-
-        if self.id is None:
-            pass
-        elif self.id == 0:
-            posts = Post.objects.filter(category__isnull=True)
-        else:
-            if exclude_subcategories:
-                posts = self.posts
-            else:
-                posts = Post.objects.filter(
-                    category__in=Category.get_descendants(self, include_self=True)
-                )
-
-        return posts.count()
+        return CategoryPostCount.count(
+            self, info.context.user.is_authenticated, exclude_subcategories
+        )
 
     @staticmethod
     def resolve_posts(self, info):
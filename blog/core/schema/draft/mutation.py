@@ -68,11 +68,7 @@ class CreateDraftMutation(graphene.Mutation):
             raise InternalServerError()
 
         try:
-            input_tag_names = set(data.tags)
-
-            for name in input_tag_names:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                draft.tags.add(tag)
+            draft.set_tags(data.tags)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
@@ -124,27 +120,13 @@ class UpdateDraftMutation(graphene.Mutation):
             raise InvalidValueError("유효하지 않은 이미지가 포함되어 있습니다")
         draft.is_hidden = data.get("is_hidden", draft.is_hidden)
 
-        input_tag_names = set(data.tags)
-        previous_tag_names = set(draft.tags.values_list("name", flat=True))
-        tags_to_add = input_tag_names - previous_tag_names
         try:
-            for name in tags_to_add:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                draft.tags.add(tag)
+            removed_tag_ids = draft.set_tags(data.tags)
+            if kwargs.get("delete_orphan_tags", False):
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
-        tags_to_remove = draft.tags.exclude(name__in=input_tag_names)
-        delete_orphan_tags = kwargs.get("delete_orphan_tags", False)
-        try:
-            for tag in tags_to_remove:
-                draft.tags.remove(tag)
-
-                if delete_orphan_tags and tag.is_orphan:
-                    tag.delete()
-        except DatabaseError:
-            raise InternalServerError()
-
         try:
             draft.save()
         except (DatabaseError, IntegrityError):
@@ -173,11 +155,9 @@ class DeleteDraftMutation(graphene.Mutation):
             raise NotFoundError("임시 저장본을 찾을 수 없습니다")
 
         try:
-            for tag in draft.tags.all():
-                draft.tags.remove(tag)
-
-                if delete_orphan_tag and tag.is_orphan:
-                    tag.delete()
+            removed_tag_ids = draft.set_tags([])
+            if delete_orphan_tag:
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
 
             draft.delete()
         except DatabaseError:
@@ -2,7 +2,9 @@ import graphene
 
 from blog.core.errors import NotFoundError
 from blog.core.models import Draft
+from blog.core.schema.loaders import get_loaders
 from blog.utils.decorators import login_required
+from blog.utils.optimizer import optimize
 
 from . import DraftType
 
@@ -24,4 +26,5 @@ class Query(graphene.ObjectType):
     @staticmethod
     @login_required
     def resolve_drafts(self, info, **kwargs):
-        return Draft.objects.all()
+        drafts = optimize(Draft.objects.all(), info, requires={"summary": ["category"]})
+        return get_loaders(info).prime(list(drafts))
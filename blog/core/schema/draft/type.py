@@ -3,6 +3,7 @@ from graphene_django import DjangoObjectType
 
 from blog.core.models import Category, Draft
 from blog.core.schema.category import CategoryType
+from blog.core.schema.loaders import get_loaders
 
 
 class DraftType(DjangoObjectType):
@@ -23,20 +24,23 @@ class DraftType(DjangoObjectType):
 
     @staticmethod
     def resolve_category(self, info):
-        return self.category if self.category is not None else Category(id=0)
+        if self.category_id is None:
+            return Category(id=0)
+        return get_loaders(info).category_of(self)
 
     @staticmethod
     def resolve_summary(self, info):
-        return f'[{self.category.name if self.category is not None else "분류 미지정"}] {self.title or "제목 없음"}'
+        category = DraftType.resolve_category(self, info)
+        return f'[{category.name if category.id else "분류 미지정"}] {self.title or "제목 없음"}'
 
     @staticmethod
     def resolve_thumbnail(self, info):
-        return self.thumbnail.file.url if self.thumbnail else None
+        return get_loaders(info).thumbnail_url_of(self)
 
     @staticmethod
     def resolve_images(self, info):
-        return [image.file.url for image in self.images.all()]
+        return [image.file.url for image in get_loaders(info).images_of(self)]
 
     @staticmethod
     def resolve_tags(self, info):
-        return self.tags.values_list("name", flat=True)
+        return [tag.name for tag in get_loaders(info).tags_of(self)]
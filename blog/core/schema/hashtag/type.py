@@ -2,6 +2,7 @@ import graphene
 from graphene_django import DjangoObjectType
 
 from blog.core.models import Hashtag
+from blog.core.schema.loaders import get_loaders
 from blog.core.schema.post import PostType
 
 
@@ -24,4 +25,4 @@ class HashtagType(DjangoObjectType):
 
     @staticmethod
     def resolve_tagged_posts(self, info):
-        return self.tagged_posts.all()
+        return get_loaders(info).prime(list(self.tagged_posts.all()))
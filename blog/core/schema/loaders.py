@@ -0,0 +1,127 @@
+from collections import defaultdict
+
+from django.db.models import F
+
+from blog.core.models import Category, Hashtag
+from blog.media.models import Image, ImageVariant
+from blog.utils.dataloader import DataLoader
+
+
+def load_by_id(model):
+    return lambda keys: model.objects.in_bulk(keys)
+
+
+def load_related(model, related_name):
+    # Objects related to each owner, in the default order of `model`
+    def batch_load(keys):
+        related = defaultdict(list)
+        queryset = model.objects.filter(**{f"{related_name}__in": keys}).annotate(
+            owner_id=F(related_name)
+        )
+        for obj in queryset:
+            related[obj.owner_id].append(obj)
+        return related
+
+    return batch_load
+
+
+def is_prefetched(obj, name):
+    return name in getattr(obj, "_prefetched_objects_cache", {})
+
+
+class Loaders:
+    def __init__(self):
+        self.category = DataLoader(load_by_id(Category))
+        self.image = DataLoader(load_by_id(Image))
+        self.variants = DataLoader(
+            load_related(ImageVariant, "image"), default_factory=list
+        )
+        self._tags = {}
+        self._images = {}
+
+    def tags(self, model):
+        if model not in self._tags:
+            self._tags[model] = DataLoader(
+                load_related(Hashtag, f"tagged_{model._meta.model_name}s"),
+                default_factory=list,
+            )
+        return self._tags[model]
+
+    def images(self, model):
+        if model not in self._images:
+            self._images[model] = DataLoader(
+                load_related(Image, f"{model._meta.model_name}_content_of"),
+                default_factory=list,
+            )
+        return self._images[model]
+
+    def category_of(self, obj):
+        # Reuses the category if it was fetched along with `obj`
+        if type(obj).category.is_cached(obj):
+            return obj.category
+        return self.category.load(obj.category_id)
+
+    def thumbnail_of(self, obj):
+        # None if the image is missing, e.g. an unconfirmed upload
+        if type(obj).thumbnail.is_cached(obj):
+            return obj.thumbnail
+        return self.image.load(obj.thumbnail_id)
+
+    def thumbnail_url_of(self, obj):
+        if obj.thumbnail_id is None:
+            return None
+        thumbnail = self.thumbnail_of(obj)
+        return thumbnail.file.url if thumbnail is not None else None
+
+    def tags_of(self, obj):
+        # Reuses the tags if they were prefetched along with `obj`
+        if is_prefetched(obj, "tags"):
+            return list(obj.tags.all())
+        return self.tags(type(obj)).load(obj.pk)
+
+    def images_of(self, obj):
+        if is_prefetched(obj, "images"):
+            return list(obj.images.all())
+        return self.images(type(obj)).load(obj.pk)
+
+    def variants_of(self, image):
+        if is_prefetched(image, "variants"):
+            return list(image.variants.all())
+        return self.variants.load(image.pk)
+
+    def srcset_of(self, image):
+        # The variants and the original, narrowest first
+        if image is None:
+            return None
+        candidates = [
+            f"{variant.file.url} {variant.width}w"
+            for variant in self.variants_of(image)
+        ]
+        if image.width:
+            candidates.append(f"{image.file.url} {image.width}w")
+        return ", ".join(candidates) or None
+
+    def prime(self, objs):
+        # Called by list resolvers, so that the fields of every item are
+        # loaded together with the first one
+        for obj in objs:
+            model = type(obj)
+            if getattr(obj, "category_id", None) is not None:
+                if not model.category.is_cached(obj):
+                    self.category.prime(obj.category_id)
+            if obj.thumbnail_id is not None:
+                if not model.thumbnail.is_cached(obj):
+                    self.image.prime(obj.thumbnail_id)
+                self.variants.prime(obj.thumbnail_id)
+            if not is_prefetched(obj, "tags"):
+                self.tags(model).prime(obj.pk)
+            if not is_prefetched(obj, "images"):
+                self.images(model).prime(obj.pk)
+        return objs
+
+
+def get_loaders(info):
+    # Loaders live in the request, so that nothing is shared between requests
+    if not hasattr(info.context, "loaders"):
+        info.context.loaders = Loaders()
+    return info.context.loaders
@@ -1,11 +1,19 @@
+import re
 from ast import literal_eval
+from functools import reduce
+from operator import or_
 
-from django.db.models import Q
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F, Func, IntegerField, Q, Value
+from django.db.models.functions import Coalesce, Greatest
 from django_filters import CharFilter, FilterSet, NumberFilter
 
 from blog.core.errors import PermissionDeniedError
 from blog.core.models import Category, Post
 
+from .highlight import keyword_pattern
+
 
 class PostFilter(FilterSet):
     category_id = NumberFilter(method="filter_by_category")
@@ -61,12 +69,40 @@ class PostFilter(FilterSet):
         }
 
         keywords = set(value.split())
+        if not keywords:
+            return queryset
+
+        if settings.POST_SEARCH_BACKEND == "fulltext":
+            return queryset.filter(
+                search_vector=PostFilter.search_query(name, keywords)
+            )
+
+        # Backed by the trigram indexes on UPPER(title) and UPPER(text_content)
         query = Q()
         for field in fields_by_name[name]:
             for keyword in keywords:
                 query |= Q(**{f"{field}__icontains": keyword})
         return queryset.filter(query)
 
+    @staticmethod
+    def search_query(name, keywords):
+        weights_by_name = {
+            "title_and_content": "",
+            "title": "A",
+            "content": "B",
+        }
+
+        # Each keyword matches as a prefix, restricted to the weight of the field
+        terms = []
+        for keyword in keywords:
+            lexeme = re.sub(r"[&|!():*<>\\']", "", keyword)
+            if lexeme:
+                terms.append(f"'{lexeme}':*{weights_by_name[name]}")
+
+        return SearchQuery(
+            " | ".join(terms) or "''", search_type="raw", config="simple"
+        )
+
     def search_by_tags(self, queryset, name, value):
         value = literal_eval(value)
         if len(value):
@@ -75,53 +111,102 @@ class PostFilter(FilterSet):
             return queryset
 
     @staticmethod
-    def find_matching_intervals(str, keywords):
-        if len(keywords) <= 0:
-            return []
+    def rank_by_tags(queryset, tag):
+        return queryset.annotate(
+            relevance=Count("tags", filter=Q(tags__name__in=tag), distinct=True)
+        ).order_by("-relevance", "-created_at", "-id")
 
-        intervals = []
-        for keyword in keywords:
-            cur = 0
-            while cur < len(str):
-                cur = str.find(keyword, cur)
-                if cur == -1:
-                    break
-                intervals.append([cur, cur + len(keyword)])
-                cur += len(keyword)
+    @staticmethod
+    def rank_by_keywords(queryset, title_keywords, content_keywords):
+        if settings.POST_SEARCH_BACKEND == "fulltext":
+            queries = []
+            if title_keywords:
+                queries.append(PostFilter.search_query("title", title_keywords))
+            if content_keywords:
+                queries.append(PostFilter.search_query("content", content_keywords))
+
+            return queryset.annotate(
+                relevance=SearchRank(F("search_vector"), reduce(or_, queries))
+            ).order_by("-relevance", "-created_at", "-id")
+
+        # Same criteria as the highlights: longest highlighted text, then the
+        # number of highlights
+        def matches(field, keywords):
+            if not keywords:
+                return Value(0), Value(0)
+
+            pattern = Value(keyword_pattern(keywords))
+            text = Coalesce(field, Value(""))
+            return LongestMatch(text, pattern), MatchCount(text, pattern)
+
+        longest_title_match, title_matches = matches("title", title_keywords)
+        longest_content_match, content_matches = matches(
+            "text_content", content_keywords
+        )
 
-        if len(intervals) < 2:
-            return intervals
+        return queryset.annotate(
+            title_relevance=longest_title_match,
+            content_relevance=longest_content_match,
+            relevance=Greatest("title_relevance", "content_relevance"),
+            matches=title_matches + content_matches,
+        ).order_by(
+            "-relevance",
+            "-title_relevance",
+            "-content_relevance",
+            "-matches",
+            "-created_at",
+            "-id",
+        )
 
-        intervals.sort(key=lambda x: x[0])
-        merged_intervals = [intervals[0]]
 
-        for [start, end] in intervals[1:]:
-            prev_start, prev_end = merged_intervals[-1]
-            if start <= prev_end or not str[prev_end:start].strip():
-                merged_intervals[-1] = [prev_start, max(prev_end, end)]
-            else:
-                merged_intervals.append([start, end])
+class KeywordMatches(Func):
+    # Finds the longest keyword at every position, then merges the overlapping
+    # ones and those separated only by whitespaces, as Highlighter.find does.
+    # The function aggregates the lengths of the merged matches.
+    template = r"""(
+        WITH RECURSIVE args(text, pattern) AS (SELECT %(expressions)s),
+        keyword(start, stop) AS (
+            SELECT REGEXP_INSTR(text, pattern, 1, 1, 0, 'i'),
+                REGEXP_INSTR(text, pattern, 1, 1, 1, 'i')
+            FROM args
+            UNION ALL
+            SELECT REGEXP_INSTR(text, pattern, start + 1, 1, 0, 'i'),
+                REGEXP_INSTR(text, pattern, start + 1, 1, 1, 'i')
+            FROM keyword, args
+            WHERE start > 0
+        ),
+        joined(start, stop, is_joined) AS (
+            SELECT start, stop, COALESCE(
+                SUBSTR(text, previous_stop, GREATEST(start - previous_stop, 0))
+                ~ '^\s*$',
+                FALSE
+            )
+            FROM (
+                SELECT start, stop, MAX(stop) OVER (
+                    ORDER BY start ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ) AS previous_stop
+                FROM keyword
+                WHERE start > 0
+            ) AS keyword, args
+        ),
+        merged(length) AS (
+            SELECT MAX(stop) - MIN(start)
+            FROM (
+                SELECT start, stop,
+                    COUNT(*) FILTER (WHERE NOT is_joined) OVER (ORDER BY start)
+                    AS island
+                FROM joined
+            ) AS joined
+            GROUP BY island
+        )
+        SELECT %(function)s FROM merged
+    )"""
+    output_field = IntegerField()
 
-        return merged_intervals
 
-    @staticmethod
-    def longest_matched_text(post):
-        match_length = lambda highlight: highlight[1] - highlight[0]
-        longest_match_title = max(map(match_length, [*post.title_highlights, [0, 1]]))
-        longest_match_content = max(
-            map(match_length, [*post.content_highlights, [0, 1]])
-        )
-        longest_match = max(longest_match_title, longest_match_content)
-        return (
-            longest_match,
-            longest_match_title,
-            longest_match_content,
-            len(post.title_highlights) + len(post.content_highlights),
-        )
+class LongestMatch(KeywordMatches):
+    function = "COALESCE(MAX(length), 0)"
 
-    @staticmethod
-    def matched_tags(tag):
-        def _matched_tags(post):
-            return post.tags.filter(name__in=tag).count()
 
-        return _matched_tags
+class MatchCount(KeywordMatches):
+    function = "COUNT(*)"
@@ -0,0 +1,52 @@
+import re
+
+MAX_HIGHLIGHTS = 100
+SNIPPET_SIZE = 200
+
+
+def keyword_pattern(keywords):
+    # Longer keywords are tried first, so the longest keyword starting at a
+    # position matches, as in PostgreSQL
+    return "|".join(
+        re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)
+    )
+
+
+class Highlighter:
+    def __init__(self, keywords, max_highlights=MAX_HIGHLIGHTS):
+        self.max_highlights = max_highlights
+        # A lookahead finds the (longest) keyword at every position, including
+        # those starting inside the previous match
+        self.pattern = (
+            re.compile(f"(?=({keyword_pattern(keywords)}))", re.IGNORECASE)
+            if keywords
+            else None
+        )
+
+    def find(self, text):
+        if self.pattern is None or not text:
+            return []
+
+        # Matches come in order of their start, so overlapping matches and
+        # those separated only by whitespaces are merged as they are found
+        intervals = []
+        for match in self.pattern.finditer(text):
+            start, end = match.span(1)
+            if intervals and not text[intervals[-1][1] : start].strip():
+                intervals[-1][1] = max(intervals[-1][1], end)
+            elif len(intervals) >= self.max_highlights:
+                break
+            else:
+                intervals.append([start, end])
+        return intervals
+
+    @staticmethod
+    def snippet(text, intervals, size=SNIPPET_SIZE):
+        text = text or ""
+        if not intervals:
+            return 0, min(size, len(text))
+
+        # Window centered on the longest match
+        start, end = max(intervals, key=lambda interval: interval[1] - interval[0])
+        window_start = max(0, min((start + end - size) // 2, len(text) - size))
+        return window_start, min(len(text), window_start + size)
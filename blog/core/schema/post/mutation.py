@@ -3,9 +3,10 @@ from django.db import DatabaseError, IntegrityError
 from django.db.transaction import atomic
 
 from blog.core.errors import InternalServerError, InvalidValueError, NotFoundError
-from blog.core.models import Category, Hashtag, Post
+from blog.core.models import Category, CategoryPostCount, Hashtag, Post
 from blog.media.models import Image
 from blog.media.utils import get_image, get_images
+from blog.prerender.snapshots import prerender_on_commit
 from blog.utils.convertid import localid
 from blog.utils.decorators import login_required
 
@@ -65,18 +66,16 @@ class CreatePostMutation(graphene.Mutation):
             )
             post.images.set(images)
             post.save()
+            CategoryPostCount.update(None, CategoryPostCount.state_of(post))
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
         try:
-            input_tag_names = set(data.tags)
-
-            for name in input_tag_names:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                post.tags.add(tag)
+            post.set_tags(data.tags)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
+        prerender_on_commit(post_ids=[post.id])
         return CreatePostMutation(success=True, created_post=post)
 
 
@@ -99,6 +98,7 @@ class UpdatePostMutation(graphene.Mutation):
             post = Post.objects.get(id=post_id)
         except Post.DoesNotExist:
             raise NotFoundError("게시글을 찾을 수 없습니다")
+        counted_as = CategoryPostCount.state_of(post)
 
         data = kwargs.get("data")
         post.title = data.get("title", post.title)
@@ -123,32 +123,20 @@ class UpdatePostMutation(graphene.Mutation):
             raise InvalidValueError("유효하지 않은 이미지가 포함되어 있습니다")
         post.is_hidden = data.get("is_hidden", post.is_hidden)
 
-        input_tag_names = set(data.tags)
-        previous_tag_names = set(post.tags.values_list("name", flat=True))
-        tags_to_add = input_tag_names - previous_tag_names
         try:
-            for name in tags_to_add:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                post.tags.add(tag)
+            removed_tag_ids = post.set_tags(data.tags)
+            if kwargs.get("delete_orphan_tags", False):
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
-        tags_to_remove = post.tags.exclude(name__in=input_tag_names)
-        delete_orphan_tags = kwargs.get("delete_orphan_tags", False)
-        try:
-            for tag in tags_to_remove:
-                post.tags.remove(tag)
-
-                if delete_orphan_tags and tag.is_orphan:
-                    tag.delete()
-        except DatabaseError:
-            raise InternalServerError()
-
         try:
             post.save()
+            CategoryPostCount.update(counted_as, CategoryPostCount.state_of(post))
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
+        prerender_on_commit(post_ids=[post.id])
         return UpdatePostMutation(success=True, updated_post=post)
 
 
@@ -168,22 +156,23 @@ class DeletePostMutation(graphene.Mutation):
 
         try:
             post = Post.objects.get(id=post_id)
+            counted_as = CategoryPostCount.state_of(post)
             post.is_deleted = True
             post.save(update_fields=["is_deleted"])
         except Post.DoesNotExist:
             raise NotFoundError("게시글을 찾을 수 없습니다")
 
         try:
-            for tag in post.tags.all():
-                post.tags.remove(tag)
-
-                if delete_orphan_tag and tag.is_orphan:
-                    tag.delete()
+            removed_tag_ids = post.set_tags([])
+            if delete_orphan_tag:
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
 
             post.delete()
+            CategoryPostCount.update(counted_as, None)
         except DatabaseError:
             raise InternalServerError()
 
+        prerender_on_commit(post_ids=[post_id])
         return DeletePostMutation(success=True)
 
 
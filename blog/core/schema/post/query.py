@@ -1,14 +1,16 @@
-import math
-
 import graphene
 
 from blog.core.errors import InvalidValueError, NotFoundError, PermissionDeniedError
 from blog.core.models import Post
+from blog.core.schema.loaders import get_loaders
 from blog.utils.convertid import localid
+from blog.utils.optimizer import optimize
+from blog.utils.pagination import paginate, paginate_by_keyset
 
 from . import PostType
 from .filter import PostFilter
-from .type import PageInfoType, PaginatedPostType
+from .highlight import Highlighter
+from .type import PaginatedPostType
 
 
 class Query(graphene.ObjectType):
@@ -25,6 +27,8 @@ class Query(graphene.ObjectType):
         page_size=graphene.Int(),
         offset=graphene.Int(),
         target_post=graphene.ID(),
+        after=graphene.String(),
+        before=graphene.String(),
         order_by=graphene.String(),
     )
 
@@ -55,10 +59,17 @@ class Query(graphene.ObjectType):
         queryset = PostFilter(
             data=kwargs, queryset=Post.objects.all(), user=info.context.user
         ).qs
+        queryset = optimize(
+            queryset,
+            info,
+            ("posts",),
+            requires={
+                "content_highlights": ["text_content"],
+                "content_snippet": ["text_content"],
+                "thumbnail_srcset": ["thumbnail"],
+            },
+        )
 
-        queryset = list(queryset)
-
-        # Highlighting
         title_keywords = set(
             map(
                 lambda keyword: keyword.lower(),
@@ -71,13 +82,6 @@ class Query(graphene.ObjectType):
                 kwargs.get("content", kwargs.get("title_and_content", "")).split(),
             )
         )
-        for post in queryset:
-            post.title_highlights = PostFilter.find_matching_intervals(
-                post.title.lower(), title_keywords
-            )
-            post.content_highlights = PostFilter.find_matching_intervals(
-                post.text_content.lower(), content_keywords
-            )
 
         # ordering
         order_by = kwargs.get("order_by", "recent")
@@ -87,39 +91,61 @@ class Query(graphene.ObjectType):
                 f"Invalid sort condition '{order_by}'. must be one of: {VALID_CONDITIONS}"
             )
 
+        posts = queryset
         if order_by == "relavant":
             tag = kwargs.get("tag", [])
             if len(tag):
-                queryset.sort(
-                    key=PostFilter.matched_tags(tag),
-                    reverse=True,
-                )
+                posts = PostFilter.rank_by_tags(queryset, tag)
             elif len(title_keywords) or len(content_keywords):
-                queryset.sort(
-                    key=PostFilter.longest_matched_text,
-                    reverse=True,
+                posts = PostFilter.rank_by_keywords(
+                    queryset, title_keywords, content_keywords
                 )
 
         # Pagination
-        page_size = kwargs.pop("page_size", queryset.__len__() or 1)
-        target_post = kwargs.pop("target_post", None)
-
+        target_post = kwargs.get("target_post", None)
         if target_post:
-            target_post = localid(target_post)
             try:
-                post = Post.objects.get(id=target_post)
-                post_position = list(queryset).index(post)
-            except ValueError:
+                target_post = Post.objects.get(id=localid(target_post))
+            except Post.DoesNotExist:
                 raise NotFoundError()
-            offset = post_position // page_size * page_size
-        else:
-            offset = kwargs.pop("offset", 0)
 
-        pages = math.ceil(queryset.__len__() / page_size)
-        current_page = offset // page_size
-        queryset = queryset[offset : offset + page_size]
+        after = kwargs.get("after", None)
+        before = kwargs.get("before", None)
+        try:
+            if posts is queryset:
+                page, page_info = paginate_by_keyset(
+                    posts,
+                    ("-created_at", "-id"),
+                    page_size=kwargs.get("page_size", None),
+                    offset=kwargs.get("offset", 0),
+                    after=after,
+                    before=before,
+                    target=target_post,
+                )
+            else:
+                if after is not None or before is not None:
+                    raise InvalidValueError(
+                        "커서는 최신순 정렬에서만 사용할 수 있습니다"
+                    )
+                page, page_info = paginate(
+                    posts,
+                    page_size=kwargs.get("page_size", None),
+                    offset=kwargs.get("offset", 0),
+                    target=target_post,
+                )
+        except ValueError:
+            raise NotFoundError()
 
-        return PaginatedPostType(
-            posts=queryset,
-            page_info=PageInfoType(pages=pages, current_page=current_page),
-        )
+        # Highlighting
+        title_highlighter = Highlighter(title_keywords)
+        content_highlighter = Highlighter(content_keywords)
+        for post in page:
+            post.title_highlights = title_highlighter.find(post.title)
+            # text_content is deferred unless the query selects it
+            if "text_content" not in post.get_deferred_fields():
+                post.content_highlights = content_highlighter.find(post.text_content)
+
+        # Related fields of the page are loaded in one batch each
+        get_loaders(info).prime(page)
+
+        return PaginatedPostType(posts=page, page_info=page_info)
@@ -4,40 +4,73 @@ from graphene_django import DjangoObjectType
 
 from blog.core.models import Category, Post
 from blog.core.schema.category import CategoryType
+from blog.core.schema.loaders import get_loaders
 from blog.utils.pagination import PageInfoType
 
 from .filter import PostFilter
+from .highlight import SNIPPET_SIZE, Highlighter
+
+
+class SnippetType(graphene.ObjectType):
+    text = graphene.String()
+    offset = graphene.Int()
+    highlights = graphene.List(graphene.List(graphene.Int))
 
 
 class PostType(DjangoObjectType):
     category = graphene.Field(CategoryType)
     thumbnail = graphene.String()
+    thumbnail_srcset = graphene.String()
     images = graphene.List(graphene.String)
     tags = graphene.List(graphene.String)
     title_highlights = graphene.List(graphene.List(graphene.Int))
     content_highlights = graphene.List(graphene.List(graphene.Int))
+    content_snippet = graphene.Field(SnippetType, size=graphene.Int(SNIPPET_SIZE))
 
     class Meta:
         model = Post
         interfaces = (Node,)
         filterset_class = PostFilter
-        fields = "__all__"
+        exclude = ["search_vector"]
 
     @staticmethod
     def resolve_category(self, info):
-        return self.category if self.category is not None else Category(id=0)
+        if self.category_id is None:
+            return Category(id=0)
+        return get_loaders(info).category_of(self)
 
     @staticmethod
     def resolve_thumbnail(self, info):
-        return self.thumbnail.file.url if self.thumbnail else None
+        return get_loaders(info).thumbnail_url_of(self)
+
+    @staticmethod
+    def resolve_thumbnail_srcset(self, info):
+        if self.thumbnail_id is None:
+            return None
+        loaders = get_loaders(info)
+        return loaders.srcset_of(loaders.thumbnail_of(self))
 
     @staticmethod
     def resolve_images(self, info):
-        return [image.file.url for image in self.images.all()]
+        return [image.file.url for image in get_loaders(info).images_of(self)]
 
     @staticmethod
     def resolve_tags(self, info):
-        return self.tags.values_list("name", flat=True)
+        return [tag.name for tag in get_loaders(info).tags_of(self)]
+
+    @staticmethod
+    def resolve_content_snippet(self, info, size=SNIPPET_SIZE):
+        highlights = getattr(self, "content_highlights", [])
+        start, end = Highlighter.snippet(self.text_content, highlights, size)
+        return SnippetType(
+            text=(self.text_content or "")[start:end],
+            offset=start,
+            highlights=[
+                [max(0, hl_start - start), min(end, hl_end) - start]
+                for hl_start, hl_end in highlights
+                if hl_end > start and hl_start < end
+            ],
+        )
 
 
 class PaginatedPostType(graphene.ObjectType):
@@ -58,11 +58,7 @@ class CreateTemplateMutation(graphene.Mutation):
             raise InternalServerError()
 
         try:
-            input_tag_names = set(data.tags)
-
-            for name in input_tag_names:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                template.tags.add(tag)
+            template.set_tags(data.tags)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
@@ -104,27 +100,13 @@ class UpdateTemplateMutation(graphene.Mutation):
         except Image.DoesNotExist:
             raise InvalidValueError("유효하지 않은 이미지가 포함되어 있습니다")
 
-        input_tag_names = set(data.tags)
-        previous_tag_names = set(template.tags.values_list("name", flat=True))
-        tags_to_add = input_tag_names - previous_tag_names
         try:
-            for name in tags_to_add:
-                tag, _ = Hashtag.objects.get_or_create(name=name)
-                template.tags.add(tag)
+            removed_tag_ids = template.set_tags(data.tags)
+            if kwargs.get("delete_orphan_tags", False):
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
-        tags_to_remove = template.tags.exclude(name__in=input_tag_names)
-        delete_orphan_tags = kwargs.get("delete_orphan_tags", False)
-        try:
-            for tag in tags_to_remove:
-                template.tags.remove(tag)
-
-                if delete_orphan_tags and tag.is_orphan:
-                    tag.delete()
-        except DatabaseError:
-            raise InternalServerError()
-
         try:
             template.save()
         except (DatabaseError, IntegrityError):
@@ -153,11 +135,9 @@ class DeleteTemplateMutation(graphene.Mutation):
             raise NotFoundError("템플릿을 찾을 수 없습니다")
 
         try:
-            for tag in template.tags.all():
-                template.tags.remove(tag)
-
-                if delete_orphan_tag and tag.is_orphan:
-                    tag.delete()
+            removed_tag_ids = template.set_tags([])
+            if delete_orphan_tag:
+                Hashtag.delete_orphans_on_commit(removed_tag_ids)
 
             template.delete()
         except DatabaseError:
@@ -2,7 +2,9 @@ import graphene
 
 from blog.core.errors import NotFoundError
 from blog.core.models import Template
+from blog.core.schema.loaders import get_loaders
 from blog.utils.decorators import login_required
+from blog.utils.optimizer import optimize
 
 from . import TemplateType
 
@@ -24,4 +26,5 @@ class Query(graphene.ObjectType):
     @staticmethod
     @login_required
     def resolve_templates(self, info, **kwargs):
-        return Template.objects.all()
+        templates = optimize(Template.objects.all(), info)
+        return get_loaders(info).prime(list(templates))
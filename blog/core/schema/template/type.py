@@ -2,6 +2,7 @@ import graphene
 from graphene_django import DjangoObjectType
 
 from blog.core.models import Template
+from blog.core.schema.loaders import get_loaders
 
 
 class TemplateType(DjangoObjectType):
@@ -20,12 +21,12 @@ class TemplateType(DjangoObjectType):
 
     @staticmethod
     def resolve_thumbnail(self, info):
-        return self.thumbnail.file.url if self.thumbnail else None
+        return get_loaders(info).thumbnail_url_of(self)
 
     @staticmethod
     def resolve_images(self, info):
-        return [image.file.url for image in self.images.all()]
+        return [image.file.url for image in get_loaders(info).images_of(self)]
 
     @staticmethod
     def resolve_tags(self, info):
-        return self.tags.values_list("name", flat=True)
+        return [tag.name for tag in get_loaders(info).tags_of(self)]
@@ -1,3 +1,270 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import RequestFactory, TestCase
+
+from blog.core.errors import InvalidValueError
+from blog.core.models import Category, CategoryPostCount, Hashtag, Post
+from blog.core.schema.loaders import Loaders
+from blog.core.schema.post.filter import PostFilter
+from blog.core.schema.post.highlight import Highlighter
+from blog.media.models import Image
+from blog.schema import schema
+from blog.utils.pagination import decode_cursor, paginate, paginate_by_keyset
+
+
+def execute(query, variables=None, user=None):
+    request = RequestFactory().post("/api/")
+    request.user = user or AnonymousUser()
+    return schema.execute(query, variables=variables, context_value=request)
+
+
+def create_post(category=None, **fields):
+    post = Post.objects.create(title="title", category=category, **fields)
+    CategoryPostCount.update(None, CategoryPostCount.state_of(post))
+    return post
+
+
+class PaginateTest(TestCase):
+    def setUp(self):
+        self.posts = [Post.objects.create(title=f"post{i}") for i in range(5)]
+
+    def test_pages_in_the_database(self):
+        with self.assertNumQueries(2):
+            page, page_info = paginate(Post.objects.order_by("id"), 2, offset=2)
+        self.assertEqual(page, self.posts[2:4])
+        self.assertEqual((page_info.pages, page_info.current_page), (3, 1))
+
+    def test_finds_the_page_of_target(self):
+        with self.assertNumQueries(3):
+            page, page_info = paginate(
+                Post.objects.order_by("id"), 2, target=self.posts[4]
+            )
+        self.assertEqual(page, self.posts[4:])
+        self.assertEqual(page_info.current_page, 2)
+
+
+class CategoryHierarchyTest(TestCase):
+    def setUp(self):
+        self.parent = Category.objects.create(name="parent")
+        self.child = Category.objects.create(name="child", subcategory_of=self.parent)
+        self.hidden = Category.objects.create(
+            name="hidden", subcategory_of=self.parent, is_hidden=True
+        )
+        create_post(self.parent)
+        create_post(self.child)
+        create_post(self.child, is_hidden=True)
+        create_post(self.hidden)
+        create_post()
+
+    def hierarchy(self, user=None):
+        result = execute("{ categoryHierarchy }", user=user)
+        self.assertIsNone(result.errors)
+        return json.loads(json.loads(result.data["categoryHierarchy"]))
+
+    def test_counts_subtrees(self):
+        everything, parent, uncategorized = self.hierarchy(
+            User.objects.create(username="admin")
+        )
+        self.assertEqual(everything["postCount"], 5)
+        self.assertEqual(uncategorized["postCount"], 1)
+        self.assertEqual(parent["postCount"], 4)
+        self.assertEqual(
+            [(child["name"], child["postCount"]) for child in parent["subcategories"]],
+            [("child", 2), ("hidden", 1)],
+        )
+
+        everything, parent, uncategorized = self.hierarchy()
+        self.assertEqual(everything["postCount"], 3)
+        self.assertEqual(parent["postCount"], 2)
+        self.assertEqual(
+            [child["name"] for child in parent["subcategories"]], ["child"]
+        )
+
+    def test_queries_do_not_grow_with_categories(self):
+        with self.assertNumQueries(2):
+            self.hierarchy()
+
+        for i in range(5):
+            Category.objects.create(name=f"sub{i}", subcategory_of=self.child)
+        with self.assertNumQueries(2):
+            self.hierarchy()
+
+    def test_counts_follow_post_changes(self):
+        post = create_post(self.child)
+        before = CategoryPostCount.state_of(post)
+        post.category = None
+        post.is_hidden = True
+        post.save()
+        CategoryPostCount.update(before, CategoryPostCount.state_of(post))
+
+        self.assertEqual(CategoryPostCount.count(self.child, True), 2)
+        self.assertEqual(CategoryPostCount.count(Category(id=0), True), 2)
+        self.assertEqual(CategoryPostCount.count(Category(id=0), False), 1)
+        self.assertEqual(
+            CategoryPostCount.count(self.parent, True, exclude_subcategories=True), 1
+        )
+
+    def test_rebuild_matches_updates(self):
+        counts = list(CategoryPostCount.objects.order_by("category_id").values_list())
+        CategoryPostCount.objects.all().delete()
+        CategoryPostCount.rebuild()
+        self.assertEqual(
+            list(CategoryPostCount.objects.order_by("category_id").values_list()),
+            counts,
+        )
+
+
+class DeleteCategoryTest(TestCase):
+    mutation = """
+        mutation($id: Int!, $deletePosts: Boolean) {
+            deleteCategory(id: $id, deletePosts: $deletePosts) {
+                categoryCount postCount
+            }
+        }
+    """
+
+    def test_counts_only_live_rows(self):
+        parent = Category.objects.create(name="parent")
+        Category.objects.create(name="child", subcategory_of=parent)
+        deleted = Category.objects.create(
+            name="deleted", subcategory_of=parent, is_deleted=True
+        )
+        create_post(parent)
+        create_post(deleted, is_deleted=True)
+
+        result = execute(
+            self.mutation,
+            {"id": parent.id, "deletePosts": True},
+            user=User.objects.create(username="admin"),
+        )
+        self.assertIsNone(result.errors)
+        self.assertEqual(
+            result.data["deleteCategory"], {"categoryCount": 2, "postCount": 1}
+        )
+        self.assertFalse(Post.objects.filter(is_deleted=False).exists())
+
+
+class PostsQueryTest(TestCase):
+    query = """
+        {
+            posts {
+                posts { title category { name } thumbnail thumbnailSrcset tags }
+            }
+        }
+    """
+
+    def setUp(self):
+        self.category = Category.objects.create(name="category")
+        self.user = User.objects.create(username="admin", is_staff=True)
+
+    def create_posts(self, count):
+        first = Post.objects.count()
+        for i in range(first, first + count):
+            image = Image.objects.create(file=f"media/{i}.png", width=10, height=10)
+            post = create_post(self.category, thumbnail=image)
+            post.set_tags([f"tag{i}", "common"])
+
+    def test_queries_do_not_grow_with_posts(self):
+        self.create_posts(2)
+        with self.assertNumQueries(4):
+            result = execute(self.query, user=self.user)
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data["posts"]["posts"]), 2)
+
+        self.create_posts(3)
+        with self.assertNumQueries(4):
+            result = execute(self.query, user=self.user)
+        self.assertEqual(len(result.data["posts"]["posts"]), 5)
+
+    def test_pending_thumbnail(self):
+        image = Image(is_pending=True)
+        image.file.name = "media/pending.png"
+        image.save()
+        post = Post.objects.get(id=create_post(thumbnail=image).id)
+
+        # Loaded with the file of the image, a pending row would be read from
+        # the storage
+        loaders = Loaders()
+        self.assertIsNone(loaders.thumbnail_url_of(post))
+        self.assertIsNone(loaders.srcset_of(loaders.thumbnail_of(post)))
+
+
+class SetTagsTest(TestCase):
+    def test_creates_only_missing_tags(self):
+        existing = Hashtag.objects.create(name="existing")
+        post = create_post()
+
+        with self.assertNumQueries(6):
+            post.set_tags(["existing", "new"])
+        self.assertEqual(Hashtag.objects.get(name="existing").id, existing.id)
+        self.assertEqual(
+            set(post.tags.values_list("name", flat=True)), {"existing", "new"}
+        )
+
+        removed = post.set_tags(["new"])
+        self.assertEqual(removed, {existing.id})
+        self.assertEqual(list(post.tags.values_list("name", flat=True)), ["new"])
+
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        for _ in range(5):
+            create_post()
+
+    def test_rejects_invalid_page(self):
+        with self.assertRaises(InvalidValueError):
+            paginate(Post.objects.all(), page_size=0)
+        with self.assertRaises(InvalidValueError):
+            paginate_by_keyset(Post.objects.all(), ("-id",), page_size=2, offset=-1)
+
+        result = execute("{ posts(pageSize: 0) { posts { title } } }")
+        self.assertEqual(result.errors[0].extensions["type"], "InvalidValueError")
+
+    def test_rejects_invalid_cursor(self):
+        for cursor in ["", "not base64", "WyJ4Il0=", "W251bGxd"]:
+            with self.assertRaises(InvalidValueError):
+                decode_cursor(cursor, Post, ("-id",))
+
+    def test_pages_by_cursor(self):
+        queryset = Post.objects.all()
+        first, page_info = paginate_by_keyset(queryset, ("-id",), page_size=2)
+        second, page_info = paginate_by_keyset(
+            queryset, ("-id",), page_size=2, after=page_info.next_cursor
+        )
+        self.assertEqual(page_info.current_page, 1)
+        self.assertEqual(
+            [post.id for post in first + second],
+            list(queryset.order_by("-id").values_list("id", flat=True)[:4]),
+        )
+
+
+class RankByKeywordsTest(TestCase):
+    def rank(self, keywords, *texts):
+        for text in texts:
+            create_post(text_content=text)
+        ranked = PostFilter.rank_by_keywords(Post.objects.all(), set(), keywords)
+        return [(post.text_content, post.relevance, post.matches) for post in ranked]
+
+    def test_ranks_as_highlighted(self):
+        keywords = {"abc", "bcd"}
+        ranked = self.rank(keywords, "ABC-abc", "abcd", "abc abc")
+        # Overlapping keywords merge into one match, as they are highlighted
+        self.assertEqual(ranked, [("abc abc", 7, 1), ("abcd", 4, 1), ("ABC-abc", 3, 2)])
+        for text, relevance, matches in ranked:
+            intervals = Highlighter(keywords).find(text)
+            self.assertEqual(max(end - start for start, end in intervals), relevance)
+            self.assertEqual(len(intervals), matches)
+
+
+class HighlighterTest(TestCase):
+    def test_merges_overlapping_matches(self):
+        highlighter = Highlighter({"abc", "bcd", "xy"})
+        self.assertEqual(highlighter.find("abcd xy z xy"), [[0, 7], [10, 12]])
+
+    def test_ignores_case(self):
+        self.assertEqual(Highlighter({"django"}).find("Django"), [[0, 6]])
+
+    def test_limits_highlights(self):
+        highlighter = Highlighter({"a"}, max_highlights=2)
+        self.assertEqual(highlighter.find("a b a c a"), [[0, 1], [4, 5]])
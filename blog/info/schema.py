@@ -1,13 +1,15 @@
 from os.path import splitext
 
 import graphene
-from django.core.files.base import ContentFile
 from django.db import DatabaseError, IntegrityError
 from graphene_django import DjangoObjectType
 from graphene_file_upload.scalars import Upload
 
-from blog.core.errors import InternalServerError
+from blog.core.errors import InternalServerError, InvalidValueError
 from blog.info.models import Info
+from blog.media.utils import is_image_file
+from blog.prerender.snapshots import prerender_on_commit
+from blog.storage import clear_file, unique_name
 from blog.utils.decorators import login_required
 
 
@@ -63,24 +65,28 @@ class UpdateInfoMutation(graphene.Mutation):
         info.description = data.get("description", info.description)
         if "avatar" in data:
             avatar_image = data.get("avatar")
-            info.avatar.delete()
+            if avatar_image is not None and not is_image_file(avatar_image):
+                raise InvalidValueError("이미지 파일이 아닙니다")
+            clear_file(info.avatar)
             if avatar_image is not None:
-                content_file = ContentFile(avatar_image.read())
                 _, ext = splitext(avatar_image.name)
-                info.avatar.save(f"profile{ext}", content_file, save=True)
+                info.avatar.save(unique_name(f"profile{ext}"), avatar_image, save=True)
         if "favicon" in data:
             favicon = data.get("favicon")
             if favicon is None:
-                info.favicon.delete()
+                clear_file(info.favicon)
+            elif not is_image_file(favicon):
+                raise InvalidValueError("이미지 파일이 아닙니다")
             else:
-                content_file = ContentFile(favicon.read())
-                info.favicon.save("favicon.ico", content_file, save=True)
+                info.favicon.save("favicon.ico", favicon, save=True)
 
         try:
             info.save()
         except (DatabaseError, IntegrityError):
             raise InternalServerError()
 
+        # Every page is titled after the blog
+        prerender_on_commit()
         return UpdateInfoMutation(success=True, updated_info=info)
 
 
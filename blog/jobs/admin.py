@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from blog.jobs.models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "attempts", "run_at", "started_at", "failed_at")
+    list_filter = ("name",)
+    readonly_fields = ("created_at",)
+
+
+admin.site.register(Job, JobAdmin)
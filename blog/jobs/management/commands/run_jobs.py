@@ -0,0 +1,47 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from blog.jobs.queue import run_next
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run the queued background jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for new ones",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when no job is due",
+        )
+
+    def handle(self, *args, burst, interval, **options):
+        count = 0
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    ran = run_next()
+                except DatabaseError:
+                    # The worker keeps polling while the database is unavailable
+                    logger.exception("Could not claim the next job")
+                    ran = False
+                if ran:
+                    count += 1
+                elif burst:
+                    break
+                else:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Ran {count} jobs"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-18 18:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="run_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    # Call of the function at the dotted path `name`, run by the run_jobs
+    # command. Done jobs are deleted; failed ones are retried until
+    # `max_attempts` and then kept with `failed_at` set. A started job is due
+    # again once its lease is over (see blog.jobs.queue).
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["run_at"],
+                condition=Q(failed_at__isnull=True),
+                name="jobs_job_pending_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name}({self.id})"
@@ -0,0 +1,84 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from blog.jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 3600
+# Seconds a started job is left to its worker before it is run again
+LEASE = 900
+
+
+def enqueue(func, *args, max_attempts=5):
+    # Inserted in the current transaction, so the job is only visible to the
+    # workers once the request commits, and is dropped if it rolls back
+    return Job.objects.create(
+        name=f"{func.__module__}.{func.__qualname__}",
+        args=list(args),
+        max_attempts=max_attempts,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY))
+
+
+def claim_next():
+    # Marks the job that is due first as started, skipping those claimed by
+    # other workers. Its run_at is pushed back by LEASE, so that it is run
+    # again if its worker dies, and a job whose last attempt never finished is
+    # marked as failed instead.
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(failed_at__isnull=True, run_at__lte=now)
+            .order_by("run_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        if job.attempts >= job.max_attempts:
+            job.failed_at = now
+            job.last_error = "The last attempt did not finish within its lease"
+            job.save(update_fields=["failed_at", "last_error"])
+        else:
+            job.attempts += 1
+            job.started_at = now
+            job.run_at = now + timedelta(seconds=LEASE)
+            job.save(update_fields=["attempts", "started_at", "run_at"])
+    return job
+
+
+def run_next():
+    # Runs the job that is due first outside of the transaction claiming it,
+    # then records the result. Returns False when no job is due.
+    job = claim_next()
+    if job is None:
+        return False
+    if job.failed_at is not None:
+        return True
+
+    try:
+        with transaction.atomic():
+            import_string(job.name)(*job.args)
+    except Exception:
+        logger.exception("Job %s failed", job)
+        job.last_error = traceback.format_exc()
+        job.started_at = None
+        if job.attempts >= job.max_attempts:
+            job.failed_at = timezone.now()
+        else:
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        job.save(update_fields=["last_error", "started_at", "failed_at", "run_at"])
+    else:
+        job.delete()
+    return True
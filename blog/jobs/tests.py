@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from blog.jobs.models import Job
+from blog.jobs.queue import (
+    LEASE,
+    MAX_RETRY_DELAY,
+    claim_next,
+    enqueue,
+    retry_delay,
+    run_next,
+)
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def fail(value):
+    raise ValueError(value)
+
+
+def record_started():
+    calls.append(Job.objects.get().started_at is not None)
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_and_deletes_jobs(self):
+        enqueue(record, 1)
+        enqueue(record, 2)
+
+        self.assertTrue(run_next())
+        self.assertTrue(run_next())
+        self.assertFalse(run_next())
+        self.assertEqual(calls, [1, 2])
+        self.assertFalse(Job.objects.exists())
+
+    def test_claims_before_running(self):
+        enqueue(record_started)
+        self.assertTrue(run_next())
+        self.assertEqual(calls, [True])
+
+    def test_runs_again_after_lease(self):
+        job = enqueue(record, 1, max_attempts=2)
+        claim_next()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertAlmostEqual(
+            job.run_at,
+            timezone.now() + timedelta(seconds=LEASE),
+            delta=timedelta(seconds=5),
+        )
+        # Claimed by a worker that did not record the result
+        self.assertFalse(run_next())
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertTrue(run_next())
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_fails_when_last_lease_expires(self):
+        job = enqueue(record, 1, max_attempts=1)
+        claim_next()
+        Job.objects.update(run_at=timezone.now())
+
+        self.assertTrue(run_next())
+        job.refresh_from_db()
+        self.assertIsNotNone(job.failed_at)
+        self.assertEqual(calls, [])
+
+    def run_failing(self):
+        with self.assertLogs("blog.jobs.queue", "ERROR"):
+            run_next()
+
+    def test_retries_with_backoff(self):
+        job = enqueue(fail, "error", max_attempts=3)
+
+        self.run_failing()
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError: error", job.last_error)
+        self.assertIsNone(job.failed_at)
+        self.assertAlmostEqual(
+            job.run_at, timezone.now() + retry_delay(1), delta=timedelta(seconds=5)
+        )
+        # Not due until the delay has passed
+        self.assertFalse(run_next())
+
+        for attempts in (2, 3):
+            Job.objects.update(run_at=timezone.now())
+            self.run_failing()
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempts)
+        self.assertIsNotNone(job.failed_at)
+
+        # Failed jobs are kept, but not run again
+        Job.objects.update(run_at=timezone.now())
+        self.assertFalse(run_next())
+
+    def test_retry_delay(self):
+        self.assertEqual(
+            [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)],
+            [10, 20, 40],
+        )
+        self.assertEqual(retry_delay(20).total_seconds(), MAX_RETRY_DELAY)
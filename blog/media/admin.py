@@ -18,8 +18,7 @@ class ImageAdmin(admin.ModelAdmin):
         obj.delete()
 
     def delete_queryset(self, request, queryset):
-        for obj in queryset:
-            obj.delete()
+        queryset.delete()
 
 
 admin.site.register(Image, ImageAdmin)
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.media.models import Image
+from blog.media.utils import UPLOAD_EXPIRES_IN
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the expired unconfirmed uploads, and optionally the unreferenced images"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--unreferenced",
+            action="store_true",
+            help="Also delete the images no post, draft or template references",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Keep the unreferenced images uploaded in the last DAYS days",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, unreferenced, days, **options):
+        # Their file may not exist, so the pending rows are not loaded with it
+        pending = Image.all_objects.filter(
+            is_pending=True,
+            uploaded_at__lt=timezone.now() - timedelta(seconds=UPLOAD_EXPIRES_IN),
+        ).only("id")
+        _, deleted = pending.delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted.get('media.Image', 0)} expired uploads"
+            )
+        )
+
+        if unreferenced:
+            images = Image.objects.filter(
+                id__in=Image.objects.unreferenced()
+                .filter(uploaded_at__lt=timezone.now() - timedelta(days=days))
+                .values("id")
+            )
+            _, deleted = images.delete()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Deleted {deleted.get('media.Image', 0)} unreferenced images"
+                )
+            )
+        # The files are deleted by the job workers
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from blog.media.models import Image
+from blog.media.utils import probe_image
+from blog.media.variants import VARIANT_WIDTHS, generate_variants, update_size
+
+
+class Command(BaseCommand):
+    help = "Generate the missing resized variants of the stored images"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dimensions",
+            action="store_true",
+            help="First store the dimensions of every image as displayed, "
+            "following its EXIF orientation",
+        )
+
+    def handle(self, *args, dimensions, **options):
+        if dimensions:
+            count = 0
+            for image in Image.objects.iterator():
+                try:
+                    _, size, _ = probe_image(image.file.name)
+                except FileNotFoundError as error:
+                    self.stderr.write(f"{image.file.name}: {error}")
+                    continue
+                if size is not None and size != (image.width, image.height):
+                    update_size(image, size)
+                    count += 1
+            self.stdout.write(self.style.SUCCESS(f"Updated {count} dimensions"))
+
+        count = 0
+        for image in Image.objects.filter(width__gt=VARIANT_WIDTHS[0]).iterator():
+            try:
+                count += len(generate_variants(image))
+            except Exception as error:
+                self.stderr.write(f"{image.file.name}: {error}")
+        self.stdout.write(self.style.SUCCESS(f"Generated {count} variants"))
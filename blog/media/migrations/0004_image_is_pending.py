@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0003_image_height_image_width_alter_image_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="image",
+            name="is_pending",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.7 on 2026-10-18 17:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import blog.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("media", "0004_image_is_pending"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageVariant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "file",
+                    models.FileField(
+                        storage=blog.storage.OBS,
+                        unique=True,
+                        upload_to="media/variants/",
+                    ),
+                ),
+                ("width", models.IntegerField()),
+                ("height", models.IntegerField()),
+                ("format", models.CharField(max_length=10)),
+                (
+                    "image",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="variants",
+                        to="media.image",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["width"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="imagevariant",
+            constraint=models.UniqueConstraint(
+                fields=("image", "width", "format"), name="media_imagevariant_unique"
+            ),
+        ),
+    ]
@@ -1,6 +1,44 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from blog.storage import OBS
+from blog.storage import OBS, delete_files_on_commit
+
+
+class ImageQuerySet(models.QuerySet):
+    def delete(self):
+        # Deletes the rows in one go, and the files of the images and of their
+        # variants in batches once the deletion is committed
+        delete_files_on_commit(
+            [
+                *ImageVariant.objects.filter(image__in=self).values_list(
+                    "file", flat=True
+                ),
+                *self.values_list("file", flat=True),
+            ]
+        )
+        return super().delete()
+
+    def with_reference_counts(self):
+        # One subquery per referencing relation, instead of queries per image
+        return self.annotate(
+            thumbnail_reference_count=references("template_thumbnail_of")
+            + references("draft_thumbnail_of")
+            + references("post_thumbnail_of", is_deleted=False),
+            content_reference_count=references("template_content_of")
+            + references("draft_content_of")
+            + references("post_content_of", is_deleted=False),
+        )
+
+    def unreferenced(self):
+        return self.with_reference_counts().filter(
+            thumbnail_reference_count=0, content_reference_count=0
+        )
+
+
+class ImageManager(models.Manager.from_queryset(ImageQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(is_pending=False)
 
 
 class Image(models.Model):
@@ -17,13 +55,57 @@ class Image(models.Model):
     width = models.IntegerField(null=True, blank=True)
     height = models.IntegerField(null=True, blank=True)
     uploaded_at = models.DateTimeField(null=False, auto_now_add=True)
+    # Presigned uploads that are not confirmed yet. Their file may not exist
+    # in the storage, so they are only loaded with the file deferred.
+    is_pending = models.BooleanField(default=False)
+
+    objects = ImageManager()
+    all_objects = ImageQuerySet.as_manager()
 
     class Meta:
         ordering = ["-uploaded_at"]
 
     def delete(self, *args, **kwargs):
-        self.file.delete()
+        delete_files_on_commit(
+            [*self.variants.values_list("file", flat=True), self.file.name]
+        )
         super().delete(*args, **kwargs)
 
     def __str__(self):
         return self.file.url
+
+
+class ImageVariant(models.Model):
+    # Resized and re-encoded copy of an image, listed in its srcset
+    image = models.ForeignKey(Image, on_delete=models.CASCADE, related_name="variants")
+    file = models.FileField(storage=OBS, upload_to="media/variants/", unique=True)
+    width = models.IntegerField()
+    height = models.IntegerField()
+    format = models.CharField(max_length=10)
+
+    class Meta:
+        ordering = ["width"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["image", "width", "format"], name="media_imagevariant_unique"
+            )
+        ]
+
+    def __str__(self):
+        return self.file.url
+
+
+def references(related_name, **filters):
+    relation = Image._meta.get_field(related_name)
+    referencing = relation.related_model._base_manager.filter(
+        **{relation.field.name: OuterRef("pk")}, **filters
+    )
+    return Coalesce(
+        Subquery(
+            referencing.order_by()
+            .values(relation.field.name)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
@@ -1,16 +1,29 @@
-import filetype
 import graphene
-from django.core.files.base import ContentFile
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.db import DatabaseError
 from graphene_django import DjangoObjectType
 from graphene_file_upload.scalars import Upload
 
+from blog.api.models import CacheVersion
 from blog.core.errors import InternalServerError, InvalidValueError, NotFoundError
+from blog.core.schema.loaders import get_loaders
 from blog.core.schema.post import PostType
 from blog.media.models import Image
-from blog.media.utils import get_image
+from blog.media.utils import (
+    create_presigned_upload,
+    get_filename_from_url,
+    get_image,
+    get_image_size,
+    is_image_file,
+    normalize_mime,
+    probe_image,
+    upload_key,
+)
+from blog.media.variants import generate_variants_on_commit
 from blog.utils.decorators import login_required
+from blog.utils.optimizer import optimize, selected_fields
+from blog.utils.pagination import PageInfoType, paginate_by_keyset
 
 
 class FileSizeUnit(graphene.Enum):
@@ -22,6 +35,7 @@ class FileSizeUnit(graphene.Enum):
 
 class ImageType(DjangoObjectType):
     url = graphene.String()
+    srcset = graphene.String()
     name = graphene.String()
     size = graphene.Float(unit=FileSizeUnit())
     width = graphene.Int()
@@ -40,6 +54,9 @@ class ImageType(DjangoObjectType):
     def resolve_url(self, info):
         return self.file.url
 
+    def resolve_srcset(self, info):
+        return get_loaders(info).srcset_of(self)
+
     def resolve_name(self, info):
         return self.file.name.split("/")[-1]
 
@@ -47,49 +64,102 @@ class ImageType(DjangoObjectType):
         return round(self.file.size / unit.value, 2)
 
     def resolve_width(self, info):
-        return self.file.width
+        # Stored as displayed, without reading the file
+        return self.width
 
     def resolve_height(self, info):
-        return self.file.height
+        return self.height
 
     def resolve_is_referenced(self, info):
-        return (
-            self.template_thumbnail_of.exists()
-            or self.draft_thumbnail_of.exists()
-            or self.post_thumbnail_of.filter(is_deleted=False).exists()
-            or self.template_content_of.exists()
-            or self.draft_content_of.exists()
-            or self.post_content_of.filter(is_deleted=False).exists()
-        )
+        with_reference_counts(self)
+        return self.thumbnail_reference_count + self.content_reference_count > 0
 
     def resolve_thumbnail_reference_count(self, info):
-        count = 0
-        count += self.template_thumbnail_of.count()
-        count += self.draft_thumbnail_of.count()
-        count += self.post_thumbnail_of.filter(is_deleted=False).count()
-        return count
+        with_reference_counts(self)
+        return self.thumbnail_reference_count
 
     def resolve_post_thumbnail_of(self, info):
-        return self.post_thumbnail_of.filter(is_deleted=False).all()
+        return get_loaders(info).prime(
+            list(self.post_thumbnail_of.filter(is_deleted=False))
+        )
 
     def resolve_content_reference_count(self, info):
-        count = 0
-        count += self.template_content_of.count()
-        count += self.draft_content_of.count()
-        count += self.post_content_of.filter(is_deleted=False).count()
-        return count
+        with_reference_counts(self)
+        return self.content_reference_count
 
     def resolve_post_content_of(self, info):
-        return self.post_content_of.filter(is_deleted=False).all()
+        return get_loaders(info).prime(
+            list(self.post_content_of.filter(is_deleted=False))
+        )
 
 
-class Query(graphene.ObjectType):
+def with_reference_counts(image):
+    # Images listed by the queries below come annotated already
+    if not hasattr(image, "thumbnail_reference_count"):
+        counts = (
+            Image.objects.with_reference_counts()
+            .values("thumbnail_reference_count", "content_reference_count")
+            .get(pk=image.pk)
+        )
+        for name, count in counts.items():
+            setattr(image, name, count)
+
+
+REFERENCE_FIELDS = {
+    "is_referenced",
+    "thumbnail_reference_count",
+    "content_reference_count",
+}
+
+
+def image_queryset(info, path=(), unreferenced=False):
+    images = optimize(Image.objects.all(), info, path)
+    if "srcset" in selected_fields(info, path):
+        images = images.prefetch_related("variants")
+    if unreferenced:
+        return images.unreferenced()
+    if REFERENCE_FIELDS & selected_fields(info, path):
+        return images.with_reference_counts()
+    return images
+
+
+class PaginatedImageType(graphene.ObjectType):
     images = graphene.List(ImageType)
+    page_info = graphene.Field(PageInfoType)
+
+
+class Query(graphene.ObjectType):
+    images = graphene.List(ImageType, unreferenced=graphene.Boolean(False))
+    paginated_images = graphene.Field(
+        PaginatedImageType,
+        page_size=graphene.Int(),
+        offset=graphene.Int(),
+        after=graphene.String(),
+        before=graphene.String(),
+        unreferenced=graphene.Boolean(False),
+    )
     image = graphene.Field(ImageType, id=graphene.Int(), url=graphene.String())
 
     @staticmethod
     def resolve_images(self, info, **kwargs):
-        return Image.objects.all()
+        return image_queryset(info, unreferenced=kwargs.get("unreferenced", False))
+
+    @staticmethod
+    def resolve_paginated_images(self, info, **kwargs):
+        try:
+            images, page_info = paginate_by_keyset(
+                image_queryset(
+                    info, ("images",), unreferenced=kwargs.get("unreferenced", False)
+                ),
+                ("-uploaded_at", "-id"),
+                page_size=kwargs.get("page_size", None),
+                offset=kwargs.get("offset", 0),
+                after=kwargs.get("after", None),
+                before=kwargs.get("before", None),
+            )
+        except ValueError:
+            raise NotFoundError("이미지를 찾을 수 없습니다")
+        return PaginatedImageType(images=images, page_info=page_info)
 
     def resolve_image(self, info, **kwargs):
         id = kwargs.get("id", None)
@@ -105,10 +175,10 @@ class Query(graphene.ObjectType):
                 raise NotFoundError("이미지를 찾을 수 없습니다")
 
         if url is not None:
-            image = get_image(url)
-            if image is None:
+            try:
+                return get_image(url)
+            except Image.DoesNotExist:
                 raise NotFoundError("이미지를 찾을 수 없습니다")
-            return image
 
 
 class UploadImageMutation(graphene.Mutation):
@@ -121,16 +191,113 @@ class UploadImageMutation(graphene.Mutation):
     @login_required
     def mutate(self, info, **kwargs):
         file = kwargs.get("file")
-
-        file_mime = filetype.guess_mime(file)
-        if file_mime is None or not file_mime.startswith("image"):
+        if not is_image_file(file):
             raise InvalidValueError("이미지 파일이 아닙니다")
 
-        path = default_storage.save(f"media/{file.name}"[:50], ContentFile(file.read()))
-        created_image = Image.objects.create(file=path)
+        # The uploaded file is streamed to the storage from where the upload
+        # handler left it, and its dimensions read locally instead of being
+        # downloaded back
+        width, height = get_image_size(file)
+        path = default_storage.save(f"media/{file.name}"[:50], file)
+        created_image = Image.objects.create(file=path, width=width, height=height)
+        generate_variants_on_commit(created_image.id)
         return UploadImageMutation(url=created_image.file.url)
 
 
+class PresignedUploadType(graphene.ObjectType):
+    url = graphene.String()
+    fields = graphene.JSONString()
+
+
+class CreateImageUploadMutation(graphene.Mutation):
+    # The file is POSTed to `upload.url` with `upload.fields`, then confirmed
+    class Arguments:
+        filename = graphene.String(required=True)
+        content_type = graphene.String(required=True)
+        size = graphene.Int(required=True)
+
+    id = graphene.Int()
+    url = graphene.String()
+    upload = graphene.Field(PresignedUploadType)
+
+    @staticmethod
+    @login_required
+    def mutate(self, info, **kwargs):
+        content_type = normalize_mime(kwargs.get("content_type"))
+        if not content_type.startswith("image/"):
+            raise InvalidValueError("이미지 파일이 아닙니다")
+        if not 0 < kwargs.get("size") <= settings.IMAGE_UPLOAD_MAX_SIZE:
+            raise InvalidValueError("파일이 너무 큽니다")
+
+        # Assigned without the file descriptor, which would read the dimensions
+        # of a file that is not uploaded yet
+        image = Image(is_pending=True)
+        image.file.name = upload_key(kwargs.get("filename"))
+        try:
+            image.save()
+        except DatabaseError:
+            raise InternalServerError()
+
+        upload = create_presigned_upload(
+            image.file.name, content_type, settings.IMAGE_UPLOAD_MAX_SIZE
+        )
+        return CreateImageUploadMutation(
+            id=image.id,
+            url=image.file.url,
+            upload=PresignedUploadType(url=upload["url"], fields=upload["fields"]),
+        )
+
+
+class ConfirmImageUploadMutation(graphene.Mutation):
+    class Arguments:
+        id = graphene.Int(required=True)
+
+    url = graphene.String()
+    # Why the upload was rejected, in which case it is deleted and `url` is null
+    error = graphene.String()
+
+    @staticmethod
+    @login_required
+    def mutate(self, info, **kwargs):
+        pending = Image.all_objects.filter(id=kwargs.get("id"), is_pending=True)
+        key = pending.values_list("file", flat=True).first()
+        if key is None:
+            raise NotFoundError("업로드를 찾을 수 없습니다")
+
+        try:
+            mime, dimensions, content_type = probe_image(key)
+        except FileNotFoundError:
+            raise InvalidValueError("업로드된 파일이 없습니다")
+        # The upload policy stores the file with the Content-Type declared to
+        # CreateImageUploadMutation
+        if mime is None or not mime.startswith("image") or dimensions is None:
+            error = "이미지 파일이 아닙니다"
+        elif normalize_mime(mime) != normalize_mime(content_type):
+            error = "파일 형식이 선언된 형식과 다릅니다"
+        else:
+            error = None
+        if error is not None:
+            # Returned instead of raised, which would roll back the deletion
+            # along with the request transaction
+            try:
+                pending.delete()
+            except DatabaseError:
+                raise InternalServerError()
+            return ConfirmImageUploadMutation(error=error)
+
+        width, height = dimensions
+        try:
+            pending.update(is_pending=False, width=width, height=height)
+            CacheVersion.bump_on_commit({"image"})
+        except DatabaseError:
+            raise InternalServerError()
+        generate_variants_on_commit(kwargs["id"])
+
+        return ConfirmImageUploadMutation(
+            url=Image.objects.get(id=kwargs["id"]).file.url
+        )
+
+
 class DeleteImageMutation(graphene.Mutation):
     class Arguments:
         url = graphene.String(required=True)
@@ -140,8 +307,9 @@ class DeleteImageMutation(graphene.Mutation):
     @staticmethod
     @login_required
     def mutate(self, info, **kwargs):
-        image = get_image(kwargs.get("url"))
-        if image is None:
+        try:
+            image = get_image(kwargs.get("url"))
+        except Image.DoesNotExist:
             raise NotFoundError("이미지를 찾을 수 없습니다")
 
         try:
@@ -153,29 +321,41 @@ class DeleteImageMutation(graphene.Mutation):
 
 
 class DeleteImagesMutation(graphene.Mutation):
+    # The rows are deleted at once, and their files later by the job workers
+    # (see ImageQuerySet.delete)
     class Arguments:
         urls = graphene.List(graphene.String, required=True)
 
+    # Whether every URL was of an image
     success = graphene.Boolean()
+    # URLs of no image, which are skipped. The files are deleted after the
+    # response, so storage errors are not reported here but retried by the
+    # job, and kept in its last_error once it fails.
+    not_found = graphene.List(graphene.String)
 
     @staticmethod
     @login_required
     def mutate(self, info, **kwargs):
-        urls = kwargs.get("urls")
-        images = list(map(lambda url: get_image(url), urls))
-        for image in images:
-            if image is None:
-                raise NotFoundError("이미지를 찾을 수 없습니다")
+        keys = {
+            url: get_filename_from_url(url)
+            for url in kwargs.get("urls")
+            if url is not None
+        }
+        images = Image.objects.filter(file__in=set(keys.values()))
 
-            try:
-                image.delete()
-            except DatabaseError:
-                raise InternalServerError()
+        try:
+            found = set(images.values_list("file", flat=True))
+            images.delete()
+        except DatabaseError:
+            raise InternalServerError()
 
-        return DeleteImagesMutation(success=True)
+        not_found = [url for url, key in keys.items() if key not in found]
+        return DeleteImagesMutation(success=not not_found, not_found=not_found)
 
 
 class Mutation(graphene.ObjectType):
     upload_image = UploadImageMutation.Field()
+    create_image_upload = CreateImageUploadMutation.Field()
+    confirm_image_upload = ConfirmImageUploadMutation.Field()
     delete_image = DeleteImageMutation.Field()
     delete_images = DeleteImagesMutation.Field()
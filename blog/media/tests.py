@@ -1,3 +1,211 @@
-from django.test import TestCase
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from botocore.exceptions import ClientError
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import RequestFactory, TestCase
+from PIL import Image as PILImage
+
+from blog import storage
+from blog.core.models import Post
+from blog.info.models import Info
+from blog.jobs.models import Job
+from blog.media.models import Image, ImageVariant
+from blog.media.utils import MissingImagesError, get_image_size, get_images, upload_key
+from blog.schema import schema
+
+
+def execute(query, variables=None, user=None):
+    request = RequestFactory().post("/api/")
+    request.user = user or AnonymousUser()
+    return schema.execute(query, variables=variables, context_value=request)
+
+
+def create_image(name, **fields):
+    return Image.objects.create(file=f"media/{name}", width=10, height=10, **fields)
+
+
+class ImagesQueryTest(TestCase):
+    query = """
+        query($offset: Int) {
+            paginatedImages(pageSize: 10, offset: $offset) {
+                images { url srcset isReferenced thumbnailReferenceCount }
+                pageInfo { pages }
+            }
+        }
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="admin", is_staff=True)
+
+    def create_images(self, count):
+        first = Image.objects.count()
+        for i in range(first, first + count):
+            image = create_image(f"{i}.png")
+            ImageVariant.objects.create(
+                image=image,
+                file=f"media/variants/{i}-320w.webp",
+                width=320,
+                height=320,
+                format="webp",
+            )
+            Post.objects.create(title="title", thumbnail=image).images.add(image)
+
+    def test_queries_do_not_grow_with_images(self):
+        self.create_images(2)
+        with self.assertNumQueries(3):
+            result = execute(self.query, user=self.user)
+        self.assertIsNone(result.errors)
+        images = result.data["paginatedImages"]["images"]
+        self.assertEqual(len(images), 2)
+        self.assertTrue(all(image["isReferenced"] for image in images))
+
+        self.create_images(3)
+        with self.assertNumQueries(3):
+            result = execute(self.query, user=self.user)
+        self.assertEqual(len(result.data["paginatedImages"]["images"]), 5)
+
+    def test_invalid_page(self):
+        result = execute(self.query, {"offset": -1}, user=self.user)
+        self.assertEqual(result.errors[0].extensions["type"], "InvalidValueError")
+
+
+class GetImagesTest(TestCase):
+    def test_resolves_urls_in_one_query(self):
+        images = [create_image(f"{i}.png") for i in range(3)]
+        urls = [image.file.url for image in reversed(images)]
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_images(urls + urls[:1]), [*images[::-1], images[2]])
+
+    def test_reports_missing_urls(self):
+        image = create_image("found.png")
+        missing = image.file.url.replace("found", "missing")
+
+        with self.assertRaises(MissingImagesError) as context:
+            get_images([image.file.url, missing])
+        self.assertEqual(context.exception.urls, [missing])
+
+
+class DeleteImagesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="admin", is_staff=True)
+
+    def test_deletes_found_images(self):
+        images = [create_image(f"{i}.png") for i in range(2)]
+        missing = images[0].file.url.replace("0.png", "missing.png")
+
+        result = execute(
+            "mutation($urls: [String]!) { deleteImages(urls: $urls) { notFound } }",
+            {"urls": [image.file.url for image in images] + [missing]},
+            user=self.user,
+        )
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data["deleteImages"]["notFound"], [missing])
+        self.assertFalse(Image.objects.exists())
+        # The files are deleted by one job once the deletion is committed
+        job = Job.objects.get()
+        self.assertEqual(job.name, "blog.storage.delete_files")
+        self.assertCountEqual(job.args[0], ["media/0.png", "media/1.png"])
+
+
+class DeleteObjectsTest(TestCase):
+    def setUp(self):
+        self.s3 = mock.Mock()
+        self.s3.delete_objects.return_value = {}
+        connection = mock.patch.object(
+            storage.OBS, "connection", new_callable=mock.PropertyMock
+        )
+        connection.start().return_value.meta.client = self.s3
+        self.addCleanup(connection.stop)
+
+    def deleted_batches(self):
+        return [
+            [key["Key"] for key in call.kwargs["Delete"]["Objects"]]
+            for call in self.s3.delete_objects.call_args_list
+        ]
+
+    def test_batches_keys(self):
+        names = [f"media/{i}.png" for i in range(2500)]
+        self.assertEqual(storage.delete_objects(names + names[:10]), {})
+        self.assertEqual(
+            [len(batch) for batch in self.deleted_batches()], [1000, 1000, 500]
+        )
+
+    def test_reports_errors_per_key(self):
+        self.s3.delete_objects.side_effect = [
+            {"Errors": [{"Key": "a", "Code": "AccessDenied", "Message": "Denied"}]},
+            ClientError({"Error": {"Code": "SlowDown"}}, "DeleteObjects"),
+        ]
+        with mock.patch.object(storage, "DELETE_BATCH_SIZE", 2):
+            errors = storage.delete_objects(["a", "b", "c"])
+
+        self.assertEqual(errors["a"], "AccessDenied: Denied")
+        self.assertNotIn("b", errors)
+        self.assertIn("SlowDown", errors["c"])
+
+    def test_raises_for_failed_keys(self):
+        self.s3.delete_objects.return_value = {
+            "Errors": [{"Key": "a", "Code": "AccessDenied", "Message": "Denied"}]
+        }
+        with self.assertRaises(storage.DeleteFilesError) as context:
+            storage.delete_files(["a", "b"])
+        self.assertEqual(list(context.exception.errors), ["a"])
+
+    def test_skips_referenced_files(self):
+        # Uploaded again under the same name after the deletion was queued
+        Info.objects.create(title="title", favicon="staticfiles/favicon.ico")
+        create_image("reused.png")
+
+        storage.delete_files(
+            ["staticfiles/favicon.ico", "media/reused.png", "media/gone.png"]
+        )
+        self.assertEqual(self.deleted_batches(), [["media/gone.png"]])
+
+
+class ConfirmImageUploadTest(TestCase):
+    mutation = "mutation($id: Int!) { confirmImageUpload(id: $id) { url error } }"
+
+    def setUp(self):
+        self.user = User.objects.create(username="admin", is_staff=True)
+        self.image = create_image("upload.png", is_pending=True)
+
+    def confirm(self, probed):
+        with mock.patch("blog.media.schema.probe_image", return_value=probed):
+            with self.captureOnCommitCallbacks(execute=True):
+                result = execute(self.mutation, {"id": self.image.id}, user=self.user)
+        self.assertIsNone(result.errors)
+        return result.data["confirmImageUpload"]
+
+    def test_accepts_aliased_types(self):
+        result = self.confirm(("image/jpeg", (40, 30), "image/JPG; charset=binary"))
+        self.assertIsNone(result["error"])
+        self.assertEqual(Image.objects.get().width, 40)
+
+    def test_deletes_rejected_uploads(self):
+        result = self.confirm(("image/png", (40, 30), "image/gif"))
+        self.assertEqual(
+            result, {"url": None, "error": "파일 형식이 선언된 형식과 다릅니다"}
+        )
+        self.assertFalse(Image.all_objects.exists())
+        self.assertEqual(Job.objects.get().args, [["media/upload.png"]])
+
+
+class UploadTest(TestCase):
+    def test_upload_key(self):
+        self.assertRegex(upload_key("my photo.png"), r"^media/\w{12}/my_photo\.png$")
+        for name in ["", "..", "...", "!!!"]:
+            self.assertRegex(upload_key(name), r"^media/\w{12}/image$")
+        self.assertNotEqual(upload_key("a.png"), upload_key("a.png"))
+
+    def test_image_size_follows_orientation(self):
+        image = PILImage.new("RGB", (40, 30))
+        exif = image.getexif()
+        exif[0x0112] = 6  # Rotated by 90 degrees
+        file = BytesIO()
+        image.save(file, "JPEG", exif=exif)
+        file.seek(3)
+
+        self.assertEqual(get_image_size(file), (30, 40))
+        self.assertEqual(file.tell(), 3)
+        self.assertEqual(get_image_size(BytesIO(b"not an image")), (None, None))
@@ -1,23 +1,172 @@
+import re
+import struct
+import zlib
+from os.path import splitext
 from urllib.parse import unquote
+from uuid import uuid4
+
+import filetype
+from botocore.exceptions import ClientError
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+from PIL import ExifTags
+from PIL import Image as PILImage
+from PIL import ImageFile
 
 from blog.media.models import Image
 from blog.settings import AWS_S3_CUSTOM_DOMAIN
 
+UPLOAD_EXPIRES_IN = 3600
+PROBE_CHUNK_SIZE = 64 * 1024
+MAX_PROBE_SIZE = 1024 * 1024
+# EXIF orientations that turn the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+class MissingImagesError(Image.DoesNotExist):
+    def __init__(self, urls):
+        super().__init__(f"Images not found: {', '.join(urls)}")
+        self.urls = urls
+
 
 def get_filename_from_url(url):
-    return unquote(url.split(AWS_S3_CUSTOM_DOMAIN)[-1][1:])
+    # Storage key of the image, which is what Image.file holds
+    path = url.split(AWS_S3_CUSTOM_DOMAIN)[-1].split("?")[0]
+    return unquote(path.lstrip("/"))
 
 
 def get_image(url=None):
     if url is None:
         return None
 
-    return Image.objects.get(file__endswith=get_filename_from_url(url))
+    return get_images([url])[0]
 
 
 def get_images(urls=None):
     if urls is None or len(urls) == 0:
         return []
-    return map(
-        lambda url: Image.objects.get(file__endswith=get_filename_from_url(url)), urls
+
+    # One lookup on the unique (indexed) file column for every URL
+    keys = [get_filename_from_url(url) for url in urls]
+    images = Image.objects.in_bulk(set(keys), field_name="file")
+
+    missing = [url for url, key in zip(urls, keys) if key not in images]
+    if missing:
+        raise MissingImagesError(missing)
+    return [images[key] for key in keys]
+
+
+def is_image_file(file):
+    # Sniffed from the first bytes, and the position in `file` is restored
+    mime = filetype.guess_mime(file)
+    return mime is not None and mime.startswith("image")
+
+
+def oriented_size(image):
+    # Width and height of a PIL image as displayed, i.e. after its EXIF
+    # orientation, which is how the variants are generated too
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def get_image_size(file):
+    # Like get_image_dimensions(), but oriented. The position in `file` is
+    # restored.
+    position = file.tell()
+    try:
+        with PILImage.open(file) as image:
+            return oriented_size(image)
+    except (OSError, ValueError):
+        return None, None
+    finally:
+        file.seek(position)
+
+
+def get_storage():
+    return Image._meta.get_field("file").storage
+
+
+def upload_key(filename):
+    # A random directory keeps the name unique without asking the storage
+    try:
+        filename = get_valid_filename(filename)
+    except SuspiciousFileOperation:
+        filename = ""
+    name, ext = splitext(filename)
+    if not name.strip("."):
+        # Nothing usable is left of names like "" or "..."
+        name = "image"
+    return f"media/{uuid4().hex[:12]}/{name[:60]}{ext[:10]}"
+
+
+def create_presigned_upload(key, content_type, max_size):
+    # POST policy for uploading `key` straight to the bucket, with the ACL and
+    # object parameters the storage would have set
+    storage = get_storage()
+    fields = {"Content-Type": content_type}
+    if storage.default_acl:
+        fields["acl"] = storage.default_acl
+    for name, value in storage.object_parameters.items():
+        fields[re.sub(r"(?<!^)(?=[A-Z])", "-", name)] = value
+
+    return storage.connection.meta.client.generate_presigned_post(
+        storage.bucket_name,
+        storage._normalize_name(key),
+        Fields=fields,
+        Conditions=[{name: value} for name, value in fields.items()]
+        + [["content-length-range", 1, max_size]],
+        ExpiresIn=UPLOAD_EXPIRES_IN,
     )
+
+
+# Types some clients declare instead of the registered ones
+MIME_ALIASES = {
+    "image/jpg": "image/jpeg",
+    "image/pjpeg": "image/jpeg",
+    "image/x-png": "image/png",
+}
+
+
+def normalize_mime(mime):
+    # Without its parameters, lowercased and with the aliases resolved
+    mime = (mime or "").split(";")[0].strip().lower()
+    return MIME_ALIASES.get(mime, mime)
+
+
+def probe_image(key):
+    # Sniffed MIME type, dimensions (None if unknown) and stored Content-Type
+    # of a file, read from ranged GETs of its head instead of downloading it
+    storage = get_storage()
+    client = storage.connection.meta.client
+    parser = ImageFile.Parser()
+    head = b""
+    total = MAX_PROBE_SIZE
+    content_type = None
+
+    while parser.image is None and len(head) < min(total, MAX_PROBE_SIZE):
+        try:
+            response = client.get_object(
+                Bucket=storage.bucket_name,
+                Key=storage._normalize_name(key),
+                Range=f"bytes={len(head)}-{len(head) + PROBE_CHUNK_SIZE - 1}",
+            )
+        except ClientError as error:
+            raise FileNotFoundError(key) from error
+
+        chunk = response["Body"].read()
+        if not chunk:
+            break
+        content_range = response.get("ContentRange")
+        content_type = response.get("ContentType")
+        head += chunk
+        total = int(content_range.rsplit("/", 1)[-1]) if content_range else len(head)
+        try:
+            parser.feed(chunk)
+        except (OSError, struct.error, zlib.error, RuntimeError, ValueError):
+            break
+
+    mime = filetype.guess_mime(head)
+    dimensions = oriented_size(parser.image) if parser.image is not None else None
+    return mime, dimensions, content_type
@@ -0,0 +1,94 @@
+from io import BytesIO
+from os.path import basename, splitext
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from PIL import Image as PILImage
+from PIL import ImageOps
+
+from blog.api.models import CacheVersion
+from blog.jobs.queue import enqueue
+from blog.media.models import Image, ImageVariant
+from blog.media.utils import oriented_size
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+
+
+def missing_widths(image):
+    existing = set(
+        image.variants.filter(format=VARIANT_FORMAT).values_list("width", flat=True)
+    )
+    return [
+        width
+        for width in VARIANT_WIDTHS
+        if width < (image.width or 0) and width not in existing
+    ]
+
+
+def generate_variants(image):
+    # Downscaled copies for the widths in VARIANT_WIDTHS that are narrower than
+    # the original
+    widths = missing_widths(image)
+    if not widths:
+        return []
+
+    with image.file.open("rb") as file:
+        original = PILImage.open(file)
+        size = oriented_size(original)
+        # JPEGs are decoded at the smallest scale that is still large enough,
+        # whichever way the EXIF orientation turns them
+        original.draft("RGB", (max(widths), max(widths)))
+        original = ImageOps.exif_transpose(original)
+    if original.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in original.getbands() or "transparency" in original.info
+        original = original.convert("RGBA" if has_alpha else "RGB")
+    if size != (image.width, image.height):
+        # Stored before the dimensions followed the EXIF orientation, so that
+        # the srcset lists the original with the width it is displayed at
+        update_size(image, size)
+
+    name, _ = splitext(basename(image.file.name))
+    variants = []
+    for width in [width for width in widths if width < original.width]:
+        height = max(1, round(original.height * width / original.width))
+        buffer = BytesIO()
+        original.resize((width, height), PILImage.LANCZOS).save(
+            buffer, VARIANT_FORMAT, quality=VARIANT_QUALITY
+        )
+
+        variant = ImageVariant(
+            image=image, width=width, height=height, format=VARIANT_FORMAT
+        )
+        variant.file.save(
+            f"{name}-{width}w.{VARIANT_FORMAT}",
+            ContentFile(buffer.getvalue()),
+            save=False,
+        )
+        try:
+            with transaction.atomic():
+                variant.save()
+        except IntegrityError:
+            # Generated concurrently for the same image
+            variant.file.delete(save=False)
+            continue
+        variants.append(variant)
+    return variants
+
+
+def update_size(image, size):
+    image.width, image.height = size
+    Image.objects.filter(id=image.id).update(width=image.width, height=image.height)
+    CacheVersion.bump_on_commit({"image"})
+
+
+def run_generate_variants(image_id):
+    image = Image.objects.filter(id=image_id).first()
+    if image is not None:
+        generate_variants(image)
+
+
+def generate_variants_on_commit(image_id):
+    # Generated by the job workers, off the request path
+    enqueue(run_generate_variants, image_id)
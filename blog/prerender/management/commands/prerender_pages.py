@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog.prerender.snapshots import prerender
+
+
+class Command(BaseCommand):
+    help = "Regenerate the snapshots of every public post and category"
+
+    def handle(self, *args, **options):
+        count = prerender()
+        self.stdout.write(self.style.SUCCESS(f"Prerendered {count} pages"))
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.7 on 2026-10-18 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="PageSnapshot",
+            fields=[
+                (
+                    "path",
+                    models.CharField(max_length=200, primary_key=True, serialize=False),
+                ),
+                ("head", models.TextField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
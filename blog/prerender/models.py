@@ -0,0 +1,12 @@
+from django.db import models
+
+
+class PageSnapshot(models.Model):
+    # Prerendered <head> tags of a public page, injected into index.html when
+    # the page is requested
+    path = models.CharField(max_length=200, primary_key=True)
+    head = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
@@ -0,0 +1,162 @@
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.html import format_html
+from django.utils.text import Truncator
+
+from blog.core.models import Category, Post
+from blog.info.models import Info
+from blog.jobs.queue import enqueue
+from blog.prerender.models import PageSnapshot
+from blog.utils.convertid import globalid
+
+DESCRIPTION_LENGTH = 160
+
+# The title and the description, Open Graph and Twitter meta tags of
+# index.html, whatever the order or quoting of their attributes
+REPLACED_TAGS = re.compile(
+    r"<title\b[^>]*>.*?</title\s*>"
+    r"|<meta\b[^>]*?\b(?:name|property)\s*=\s*[\"']?"
+    r"(?:description\b|og:|twitter:)[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def post_path(post_id):
+    return settings.PRERENDER_POST_PATH.format(
+        id=post_id, global_id=globalid("PostType", post_id)
+    )
+
+
+def category_path(category_id):
+    return settings.PRERENDER_CATEGORY_PATH.format(id=category_id)
+
+
+def page_title(title, site_name):
+    return f"{title} - {site_name}" if site_name else title
+
+
+def render_head(title, description, image=None, type="website", site_name=""):
+    description = Truncator(" ".join((description or "").split())).chars(
+        DESCRIPTION_LENGTH
+    )
+    tags = [
+        format_html("<title>{}</title>", title),
+        format_html('<meta name="description" content="{}">', description),
+        format_html('<meta property="og:title" content="{}">', title),
+        format_html('<meta property="og:description" content="{}">', description),
+        format_html('<meta property="og:type" content="{}">', type),
+        format_html('<meta property="og:site_name" content="{}">', site_name),
+        format_html(
+            '<meta name="twitter:card" content="{}">',
+            "summary_large_image" if image else "summary",
+        ),
+    ]
+    if image:
+        tags.append(format_html('<meta property="og:image" content="{}">', image))
+    return "".join(tags)
+
+
+def render_page(index, path):
+    # index.html with the snapshot of `path`, if there is one
+    head = (
+        PageSnapshot.objects.filter(path=path.rstrip("/") or "/")
+        .values_list("head", flat=True)
+        .first()
+    )
+    if head is None:
+        return index
+    return REPLACED_TAGS.sub("", index).replace("</head>", f"{head}</head>", 1)
+
+
+def prerender(post_ids=None, category_ids=None):
+    # Regenerates the snapshots of the given posts and categories, and of the
+    # posts in those categories, and deletes those that are no longer public.
+    # Without arguments every snapshot is regenerated.
+    full = post_ids is None and category_ids is None
+    info = Info.objects.first() or Info(title="")
+    site_name = info.title
+    avatar = info.avatar.url if info.avatar else None
+    snapshots = []
+    stale = set()
+
+    if full:
+        snapshots.append(
+            PageSnapshot(
+                path="/",
+                head=render_head(
+                    info.title, info.description, avatar, site_name=site_name
+                ),
+            )
+        )
+
+    categories = Category.objects.all()
+    if not full:
+        categories = categories.filter(id__in=category_ids or [])
+        stale.update(category_path(id) for id in category_ids or [])
+    for category in categories:
+        if category.is_hidden or category.is_deleted:
+            continue
+        path = category_path(category.id)
+        stale.discard(path)
+        snapshots.append(
+            PageSnapshot(
+                path=path,
+                head=render_head(
+                    page_title(category.name, site_name),
+                    category.description or info.description,
+                    category.cover_image.url if category.cover_image else avatar,
+                    site_name=site_name,
+                ),
+            )
+        )
+
+    posts = Post.objects.select_related("thumbnail", "category").defer("content")
+    if not full:
+        posts = posts.filter(
+            Q(id__in=post_ids or []) | Q(category__in=category_ids or [])
+        )
+        stale.update(post_path(id) for id in post_ids or [])
+    for post in posts:
+        path = post_path(post.id)
+        stale.add(path)
+        if post.is_hidden or post.is_deleted:
+            continue
+        if post.category is not None and (
+            post.category.is_hidden or post.category.is_deleted
+        ):
+            continue
+        stale.discard(path)
+        snapshots.append(
+            PageSnapshot(
+                path=path,
+                head=render_head(
+                    page_title(post.title, site_name),
+                    post.text_content,
+                    post.thumbnail.file.url if post.thumbnail else avatar,
+                    type="article",
+                    site_name=site_name,
+                ),
+            )
+        )
+
+    PageSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["path"],
+        update_fields=["head", "updated_at"],
+    )
+    if full:
+        PageSnapshot.objects.exclude(
+            path__in=[snapshot.path for snapshot in snapshots]
+        ).delete()
+    else:
+        PageSnapshot.objects.filter(path__in=stale).delete()
+    return len(snapshots)
+
+
+def prerender_on_commit(post_ids=None, category_ids=None):
+    # Regenerated by the job workers once the request commits. Until then, or
+    # while the job is retried, the previous snapshots are served.
+    enqueue(prerender, post_ids, category_ids)
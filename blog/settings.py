@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from boto3.s3.transfer import TransferConfig
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
@@ -17,6 +19,22 @@ AWS_S3_OBJECT_PARAMETERS = {
 AWS_S3_FILE_OVERWRITE = False
 AWS_LOCATION = ""
 AWS_DEFAULT_ACL = "public-read"
+# Files are sent to the bucket in 5 MiB parts, two at a time, so that an upload
+# holds at most a few parts in memory
+AWS_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=5 * 1024 * 1024,
+    multipart_chunksize=5 * 1024 * 1024,
+    max_concurrency=2,
+)
+
+# Largest image accepted, in bytes. Uploads through the server are cut off
+# while they are received.
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv("IMAGE_UPLOAD_MAX_SIZE", str(20 * 1024 * 1024)))
+FILE_UPLOAD_HANDLERS = [
+    "blog.utils.uploadhandlers.SizeLimitUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
 
 STATICFILES_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
 DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
@@ -57,15 +75,19 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "graphene_django",
     "django_filters",
     "graphene_file_upload.django",
     "graphql_jwt.refresh_token.apps.RefreshTokenConfig",
+    "blog.api",
     "blog.media",
     "blog.info",
     "blog.core",
     "blog.jwt",
+    "blog.prerender",
+    "blog.jobs",
     "mptt",
 ]
 
@@ -120,6 +142,34 @@ DATABASES = {
     }
 }
 
+# Responses to anonymous GraphQL queries are cached in the "graphql" cache for
+# GRAPHQL_CACHE_TTL seconds. The default in-process cache evicts the least
+# recently used of GRAPHQL_CACHE_MAX_ENTRIES responses; set
+# GRAPHQL_CACHE_BACKEND/LOCATION to share it through files or Redis instead.
+GRAPHQL_CACHE_BACKEND = os.getenv(
+    "GRAPHQL_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "graphql": {
+        "BACKEND": GRAPHQL_CACHE_BACKEND,
+        "LOCATION": os.getenv("GRAPHQL_CACHE_LOCATION", "graphql"),
+        "TIMEOUT": int(os.getenv("GRAPHQL_CACHE_TTL", "60")),
+        "OPTIONS": (
+            {}
+            if GRAPHQL_CACHE_BACKEND.endswith("RedisCache")
+            else {"MAX_ENTRIES": int(os.getenv("GRAPHQL_CACHE_MAX_ENTRIES", "1000"))}
+        ),
+    },
+}
+
+# "trigram" matches substrings like `icontains` (needed for Korean),
+# "fulltext" matches words and word prefixes using the stored tsvector
+POST_SEARCH_BACKEND = os.getenv("POST_SEARCH_BACKEND", "trigram")
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -145,6 +195,17 @@ AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
 ]
 
+# Clients may send the SHA-256 hash of a registered query instead of its text.
+# "register" accepts unknown hashes sent along with their query (automatic
+# persisted queries), storing them only for staff and otherwise caching them
+# per process; "allowlist" only executes queries registered beforehand with
+# the register_persisted_queries command.
+GRAPHQL_PERSISTED_QUERIES = os.getenv("GRAPHQL_PERSISTED_QUERIES", "register")
+
+# Parsed and validated query documents kept in each process, least recently
+# used first (see document_cache_stats for the hit rate)
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "1000"))
+
 GRAPHQL_JWT = {"JWT_VERIFY_EXPIRATION": True, "JWT_LONG_RUNNING_REFRESH_TOKEN": True}
 
 LANGUAGE_CODE = "ko-kr"
@@ -155,6 +216,15 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Seconds before the index.html served for other paths is revalidated against
+# the bucket
+INDEX_PAGE_MAX_AGE = int(os.getenv("INDEX_PAGE_MAX_AGE", "60"))
+
+# Paths of the client routes that get prerendered snapshots. {id} is the
+# primary key, and {global_id} the GraphQL node id of a post.
+PRERENDER_POST_PATH = os.getenv("PRERENDER_POST_PATH", "/post/{global_id}")
+PRERENDER_CATEGORY_PATH = os.getenv("PRERENDER_CATEGORY_PATH", "/category/{id}")
+
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, ".staticfiles")
 STATICFILES_DIRS = []
@@ -1,4 +1,16 @@
+from os.path import splitext
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+from django.apps import apps
+from django.db import models
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+from blog.jobs.queue import enqueue
+
+# Most keys S3 accepts in one DeleteObjects request
+DELETE_BATCH_SIZE = 1000
 
 
 class OBS(S3Boto3Storage):
@@ -7,3 +19,82 @@ class OBS(S3Boto3Storage):
 
 class OverwriteOBS(S3Boto3Storage):
     file_overwrite = True
+
+
+class DeleteFilesError(Exception):
+    def __init__(self, errors):
+        super().__init__(
+            "Could not delete "
+            + ", ".join(f"{name} ({error})" for name, error in errors.items())
+        )
+        self.errors = errors
+
+
+def delete_objects(names):
+    # Deletes the files with DeleteObjects requests of up to DELETE_BATCH_SIZE
+    # keys, and returns the error of each file that could not be deleted
+    storage = OBS()
+    client = storage.connection.meta.client
+    names = list(dict.fromkeys(names))
+    errors = {}
+
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        keys = {
+            storage._normalize_name(clean_name(name)): name
+            for name in names[start : start + DELETE_BATCH_SIZE]
+        }
+        try:
+            response = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except ClientError as error:
+            errors.update((name, str(error)) for name in keys.values())
+            continue
+        for error in response.get("Errors", []):
+            name = keys.get(error["Key"], error["Key"])
+            errors[name] = f"{error.get('Code')}: {error.get('Message')}"
+    return errors
+
+
+def unique_name(name):
+    # Never given again, unlike the names the storage frees by deleting a
+    # file, so a queued deletion cannot reach a later upload
+    stem, ext = splitext(name)
+    return f"{stem}-{uuid4().hex[:12]}{ext}"
+
+
+def referenced_files(names):
+    # Names some row holds again, e.g. the fixed name of a file uploaded anew
+    # after the deletion of the previous one was queued
+    referenced = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField):
+                referenced.update(
+                    model._base_manager.filter(
+                        **{f"{field.name}__in": names}
+                    ).values_list(field.name, flat=True)
+                )
+    return referenced
+
+
+def delete_files(names):
+    # Missing files count as deleted, so the whole job can be retried
+    referenced = referenced_files(names)
+    errors = delete_objects([name for name in names if name not in referenced])
+    if errors:
+        raise DeleteFilesError(errors)
+
+
+def delete_files_on_commit(names):
+    # Deleted by the job workers once the rows referencing the files are gone
+    names = [name for name in names if name]
+    if names:
+        enqueue(delete_files, names)
+
+
+def clear_file(field_file):
+    # Empties the field and deletes its file once the change is committed
+    delete_files_on_commit([field_file.name])
+    field_file.name = None
@@ -15,25 +15,37 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-import requests
 from django.contrib import admin
 from django.http import HttpResponse
 from django.urls import path, re_path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_file_upload.django import FileUploadGraphQLView
 
-from .settings import AWS_S3_ENDPOINT_URL, AWS_STORAGE_BUCKET_NAME, DEBUG
+from .api.views import GraphQLView, document_cache_stats
+from .prerender.snapshots import render_page
+from .settings import (
+    AWS_S3_ENDPOINT_URL,
+    AWS_STORAGE_BUCKET_NAME,
+    DEBUG,
+    INDEX_PAGE_MAX_AGE,
+)
+from .utils.cached_page import CachedPage
+
+index_page = CachedPage(
+    f"{AWS_S3_ENDPOINT_URL}/{AWS_STORAGE_BUCKET_NAME}/staticfiles/index.html",
+    max_age=INDEX_PAGE_MAX_AGE,
+)
 
 
 def minio_static_response(request):
-    res = requests.get(
-        f"{AWS_S3_ENDPOINT_URL}/{AWS_STORAGE_BUCKET_NAME}/staticfiles/index.html"
-    )
-    return HttpResponse(res.text, content_type="text/html")
+    content = index_page.get()
+    if content is None:
+        return HttpResponse(status=503)
+    return HttpResponse(render_page(content, request.path), content_type="text/html")
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("api/", csrf_exempt(FileUploadGraphQLView.as_view(graphiql=DEBUG))),
+    path("api/", csrf_exempt(GraphQLView.as_view(graphiql=DEBUG))),
+    path("api/document-cache/", document_cache_stats),
     re_path(r"^.*$", minio_static_response),
 ]
@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class CachedPage:
+    # In-process copy of a remote page. Once older than `max_age` seconds it is
+    # revalidated with its ETag in a background thread, while the stale copy
+    # keeps being served, also when the storage is slow or down.
+    def __init__(self, url, max_age=60, timeout=5):
+        self.url = url
+        self.max_age = max_age
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.content = None
+        self.etag = None
+        self.checked_at = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    def get(self):
+        # None if the page could not be fetched yet. After a failure, the next
+        # attempt waits for `max_age` as well, and None is returned until then.
+        if self.content is None:
+            if self.is_expired():
+                with self.lock:
+                    if self.content is None and self.is_expired():
+                        self.refresh()
+        elif self.is_expired():
+            self.refresh_in_background()
+        return self.content
+
+    def is_expired(self):
+        return (
+            self.checked_at is None or time.monotonic() - self.checked_at > self.max_age
+        )
+
+    def refresh(self):
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+                self.content = response.text
+                self.etag = response.headers.get("ETag")
+        except requests.RequestException as error:
+            logger.warning("Could not refresh %s: %s", self.url, error)
+        # Failures are retried after `max_age` too, not on every request
+        self.checked_at = time.monotonic()
+
+    def refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
@@ -0,0 +1,32 @@
+class DataLoader:
+    # graphql-core resolves a list depth-first, one item after another, so keys
+    # cannot be collected while the items are resolved. Instead, list resolvers
+    # prime the keys of every item, and the first load fetches all of them in
+    # one batch.
+
+    def __init__(self, batch_load, default_factory=None):
+        # batch_load(keys) returns a dict of the values found for `keys`. The
+        # other keys get a new default_factory() each, or None.
+        self.batch_load = batch_load
+        self.default_factory = default_factory
+        self.cache = {}
+        self.pending = set()
+
+    def prime(self, key):
+        if key not in self.cache:
+            self.pending.add(key)
+
+    def load(self, key):
+        if key not in self.cache:
+            self.pending.add(key)
+            keys, self.pending = self.pending, set()
+            values = self.batch_load(list(keys))
+            for pending_key in keys:
+                if pending_key in values:
+                    self.cache[pending_key] = values[pending_key]
+                elif self.default_factory is not None:
+                    self.cache[pending_key] = self.default_factory()
+                else:
+                    self.cache[pending_key] = None
+
+        return self.cache[key]
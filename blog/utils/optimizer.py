@@ -0,0 +1,58 @@
+from django.db import models
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode
+
+
+def selected_fields(info, path=()):
+    # Names of the fields selected below `path`, including those selected
+    # through fragments
+    def collect(selection_set, path):
+        fields = set()
+        for selection in selection_set.selections if selection_set else []:
+            if isinstance(selection, FieldNode):
+                name = to_snake_case(selection.name.value)
+                if not path:
+                    fields.add(name)
+                elif name == path[0]:
+                    fields |= collect(selection.selection_set, path[1:])
+            elif isinstance(selection, InlineFragmentNode):
+                fields |= collect(selection.selection_set, path)
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = info.fragments[selection.name.value]
+                fields |= collect(fragment.selection_set, path)
+        return fields
+
+    fields = set()
+    for field_node in info.field_nodes:
+        fields |= collect(field_node.selection_set, path)
+    return fields
+
+
+def optimize(queryset, info, path=(), requires=None):
+    # Joins the foreign keys, prefetches the many-to-many fields and defers the
+    # text fields as selected by the query. `requires` maps the fields that are
+    # not model fields to the model fields they are resolved from.
+    fields = selected_fields(info, path)
+    for field in list(fields):
+        fields.update((requires or {}).get(field, []))
+
+    select_related = []
+    prefetch_related = []
+    defer = []
+    for field in queryset.model._meta.get_fields():
+        if field.auto_created:
+            continue
+        if isinstance(field, models.ForeignKey) and field.name in fields:
+            select_related.append(field.name)
+        elif isinstance(field, models.ManyToManyField) and field.name in fields:
+            prefetch_related.append(field.name)
+        elif isinstance(field, models.TextField) and field.name not in fields:
+            defer.append(field.name)
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if defer:
+        queryset = queryset.defer(*defer)
+    return queryset
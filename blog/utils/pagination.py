@@ -1,6 +1,141 @@
+import json
+import math
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
 import graphene
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from blog.core.errors import InvalidValueError
 
 
 class PageInfoType(graphene.ObjectType):
     pages = graphene.Int()
     current_page = graphene.Int()
+    next_cursor = graphene.String()
+    previous_cursor = graphene.String()
+
+
+def check_page(page_size, offset):
+    if page_size is not None and page_size <= 0:
+        raise InvalidValueError("페이지 크기는 1 이상이어야 합니다")
+    if offset is not None and offset < 0:
+        raise InvalidValueError("오프셋은 0 이상이어야 합니다")
+    return offset or 0
+
+
+def paginate(queryset, page_size=None, offset=0, target=None):
+    # Counted and sliced in the database (COUNT + LIMIT/OFFSET)
+    offset = check_page(page_size, offset)
+    total = queryset.count()
+    if page_size is None:
+        page_size = total or 1
+
+    if target is not None:
+        # Only primary keys are fetched to locate the target
+        position = list(queryset.values_list("pk", flat=True)).index(target.pk)
+        offset = position // page_size * page_size
+
+    page = list(queryset[offset : offset + page_size])
+    page_info = PageInfoType(
+        pages=math.ceil(total / page_size), current_page=offset // page_size
+    )
+    return page, page_info
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=lambda value: value.isoformat())
+    return urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, model, keys):
+    # Values are parsed by the fields of `keys`, so that a tampered cursor is
+    # rejected here instead of failing in the query
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError(cursor)
+        values = [
+            model._meta.get_field(key.lstrip("-")).to_python(value)
+            for key, value in zip(keys, values)
+        ]
+        if None in values:
+            raise ValueError(cursor)
+    except (TypeError, ValueError, ValidationError):
+        raise InvalidValueError("유효하지 않은 커서입니다")
+    return values
+
+
+def seek(keys, values, after=True, inclusive=False):
+    # Rows placed after (or before) `values` in the order given by `keys`
+    fields = [key.lstrip("-") for key in keys]
+    lookups = ["lt" if key.startswith("-") == after else "gt" for key in keys]
+    if inclusive:
+        lookups[-1] += "e"
+
+    query = Q()
+    for i, (field, lookup) in enumerate(zip(fields, lookups)):
+        ties = dict(zip(fields[:i], values[:i]))
+        query |= Q(**ties, **{f"{field}__{lookup}": values[i]})
+
+    if len(keys) > 1:
+        # Range on the leading key, so that an index on `keys` can be used
+        query &= Q(**{f"{fields[0]}__{lookups[0]}e": values[0]})
+    return query
+
+
+def paginate_by_keyset(
+    queryset, keys, page_size=None, offset=0, after=None, before=None, target=None
+):
+    # Pages are fetched by seeking on `keys` instead of skipping rows with OFFSET
+    offset = check_page(page_size, offset)
+    queryset = queryset.order_by(*keys)
+    total = queryset.count()
+    if page_size is None:
+        page_size = total or 1
+
+    def values_of(row):
+        return [getattr(row, key.lstrip("-")) for key in keys]
+
+    if target is not None:
+        preceding_rows = queryset.filter(seek(keys, values_of(target), after=False))
+        preceding = preceding_rows.count()
+        offset = preceding // page_size * page_size
+
+        head = list(preceding_rows.reverse()[: preceding - offset])[::-1]
+        tail = list(
+            queryset.filter(seek(keys, values_of(target), inclusive=True))[
+                : page_size - len(head)
+            ]
+        )
+        if not tail or tail[0].pk != target.pk:
+            raise ValueError("target is not in queryset")
+
+        page = head + tail
+        preceding = offset
+    elif after is not None:
+        following_rows = queryset.filter(
+            seek(keys, decode_cursor(after, queryset.model, keys))
+        )
+        page = list(following_rows[:page_size])
+        preceding = total - following_rows.count()
+    elif before is not None:
+        preceding_rows = queryset.filter(
+            seek(keys, decode_cursor(before, queryset.model, keys), after=False)
+        )
+        page = list(preceding_rows.reverse()[:page_size])[::-1]
+        preceding = preceding_rows.count() - len(page)
+    else:
+        page = list(queryset[offset : offset + page_size])
+        preceding = offset
+
+    has_next = preceding + len(page) < total
+    page_info = PageInfoType(
+        pages=math.ceil(total / page_size),
+        current_page=preceding // page_size,
+        next_cursor=encode_cursor(values_of(page[-1])) if page and has_next else None,
+        previous_cursor=(
+            encode_cursor(values_of(page[0])) if page and preceding > 0 else None
+        ),
+    )
+    return page, page_info
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    # Stops reading the request as soon as an uploaded file grows beyond
+    # IMAGE_UPLOAD_MAX_SIZE, instead of buffering the rest of it to disk.
+    # The request is flagged, so that the view can tell why the file is
+    # missing.
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
@@ -1,4 +1,18 @@
+import subprocess
+import sys
+
 bind = "0.0.0.0:8000"
 workers = 3
 accesslog = "-"
 loglevel = "info"
+
+
+# The queued jobs (blog.jobs) are run by a worker started next to the web
+# workers. More workers may run elsewhere with `manage.py run_jobs`.
+def when_ready(server):
+    server.jobs_worker = subprocess.Popen([sys.executable, "manage.py", "run_jobs"])
+
+
+def on_exit(server):
+    server.jobs_worker.terminate()
+    server.jobs_worker.wait()